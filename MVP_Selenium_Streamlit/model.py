@@ -22,6 +22,10 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import *
 
 
+# Separators accepted between hours and minutes ('9:30', '9.30', '9h30', ...)
+_TIME_SPLIT_RE = re.compile(r"[.:,;hH\s-]+")
+
+
 def normalize_time(value):
     """
     Normalize ANY time input into Oracle's required 'HH.MM' format.
@@ -52,7 +56,11 @@ def normalize_time(value):
     s = str(value).strip()
     if not s:
         return None
-    parts = [p for p in re.split(r"[.:,;hH\s-]+", s) if p]
+    # FAST PATH: already canonical 'HH.MM' -> integer range check, no split
+    # (isascii: str.isdigit also accepts non-ASCII digits like '٠٩')
+    if len(s) == 5 and s[2] == "." and s.isascii() and s[:2].isdigit() and s[3:].isdigit():
+        return s if int(s[:2]) <= 23 and int(s[3:]) <= 59 else None
+    parts = [p for p in _TIME_SPLIT_RE.split(s) if p]
     if len(parts) == 1:
         d = parts[0]
         if not d.isdigit():
@@ -1633,26 +1641,28 @@ class OracleAutomator:
     def create_edition_and_activities(self, edition_details):
         """
         Create edition and its activities.
-        edition_details keys:
+        edition_details (view.EditionDetails) fields:
           - course_name, edition_title, edition_start_date, edition_end_date,
             location, supplier, price, description, activities
+        activities are view.Activity namedtuples (title, description, date,
+        start_time, end_time, impegno_previsto_in_ore).
         """
         try:
-            course_name = edition_details['course_name'].title()
-            edition_title_optional = edition_details.get('edition_title', '')
-            edition_start_date = edition_details.get('edition_start_date')
-            edition_end_date_obj = edition_details.get('edition_end_date')
-            location = edition_details.get('location', "")
-            supplier = edition_details.get('supplier', "")
-            price = edition_details.get('price', "")
-            description = edition_details.get('description', "")
-            centro_costo = edition_details.get('centro_costo', '')
-            direzione_pagante = edition_details.get('direzione_pagante', '')
-            finanziata = edition_details.get('finanziata', '')
-            servizio_pagante = edition_details.get('servizio_pagante', '')
-            sottotipologia = edition_details.get('sottotipologia', '')
-            societa_pagante = edition_details.get('societa_pagante', '')
-            activities = edition_details.get('activities', [])
+            course_name = edition_details.course_name.title()
+            edition_title_optional = edition_details.edition_title
+            edition_start_date = edition_details.edition_start_date
+            edition_end_date_obj = edition_details.edition_end_date
+            location = edition_details.location
+            supplier = edition_details.supplier
+            price = edition_details.price
+            description = edition_details.description
+            centro_costo = edition_details.centro_costo
+            direzione_pagante = edition_details.direzione_pagante
+            finanziata = edition_details.finanziata
+            servizio_pagante = edition_details.servizio_pagante
+            sottotipologia = edition_details.sottotipologia
+            societa_pagante = edition_details.societa_pagante
+            activities = edition_details.activities
 
             print(f"Model (EDITION): Creating edition for {course_name} "
                   f"start {edition_start_date.strftime('%d/%m/%Y')}")
@@ -1775,12 +1785,12 @@ class OracleAutomator:
             for i, activity in enumerate(activities):
                 print(f"--- Creating activity {i + 1} of {total_activities} ---")
                 result = self._create_single_activity(
-                    unique_title=activity['title'],
-                    full_description=activity['description'],
-                    activity_date_obj=activity['date'],
-                    start_time_str=activity['start_time'],
-                    end_time_str=activity['end_time'],
-                    impegno_previsto_in_ore=activity.get('impegno_ore', '') or activity.get('impegno_previsto_in_ore', '')
+                    unique_title=activity.title,
+                    full_description=activity.description,
+                    activity_date_obj=activity.date,
+                    start_time_str=activity.start_time,
+                    end_time_str=activity.end_time,
+                    impegno_previsto_in_ore=activity.impegno_previsto_in_ore
                 )
 
                 # Backward-compatible: accept dict OR bool
@@ -1795,10 +1805,10 @@ class OracleAutomator:
                     reason = (result.get("reason") if isinstance(result, dict)
                               else "Errore sconosciuto")
                     failed_activities.append({
-                        "title": activity['title'],
-                        "date": (activity['date'].strftime('%d/%m/%Y')
-                                 if hasattr(activity['date'], 'strftime')
-                                 else str(activity['date'])),
+                        "title": activity.title,
+                        "date": (activity.date.strftime('%d/%m/%Y')
+                                 if hasattr(activity.date, 'strftime')
+                                 else str(activity.date)),
                         "reason": reason or "Attività non creata",
                     })
                     print(f"   ⚠️ Activity {i + 1} FAILED: {reason}")
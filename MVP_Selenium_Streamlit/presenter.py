@@ -60,7 +60,8 @@ class CoursePresenter:
                 self.view.show_message(
                     "course",
                     self._add_timestamp(result_message, operation_start_time),
-                    show_clear_button=True
+                    show_clear_button=True,
+                    success=False
                 )
                 return
 
@@ -83,7 +84,8 @@ class CoursePresenter:
             self.view.show_message(
                 "course",
                 self._add_timestamp(error_message, operation_start_time),
-                show_clear_button=True
+                show_clear_button=True,
+                success=False
             )
 
         finally:
@@ -210,7 +212,8 @@ class CoursePresenter:
             print(f"Presenter Error: {error_message}")
             self.view.show_message(
                 "course",
-                self._add_timestamp(error_message, operation_start_time)
+                self._add_timestamp(error_message, operation_start_time),
+                success=False
             )
 
         finally:
@@ -408,7 +411,7 @@ class CoursePresenter:
             if not oracle_user or not oracle_pass:
                 raise Exception("Credenziali Oracle mancanti. Effettua nuovamente il login.")
 
-            course_name = edition_details['course_name']
+            course_name = edition_details.course_name
 
             self.view.update_progress("edition", "Accesso a Oracle...", 10)
             if not self.model.login(oracle_url, oracle_user, oracle_pass):
@@ -441,7 +444,8 @@ class CoursePresenter:
             print(f"Presenter Error: {error_message}")
             self.view.show_message(
                 "edition",
-                self._add_timestamp(error_message, operation_start_time)
+                self._add_timestamp(error_message, operation_start_time),
+                success=False
             )
 
         finally:
@@ -469,11 +473,11 @@ class CoursePresenter:
             if not oracle_user or not oracle_pass:
                 raise Exception("Credenziali Oracle mancanti. Effettua nuovamente il login.")
 
-            edition_code = student_details['edition_code']
-            student_list = student_details['students']
+            edition_code = student_details.edition_code
+            student_list = student_details.students
             num_students = len(student_list)
             # Optional manual scadenza date (TXT method). If None → auto (tomorrow).
-            manual_scadenza = student_details.get('data_scadenza')
+            manual_scadenza = student_details.data_scadenza
 
             self.view.update_progress("student", f"Preparazione elenco {num_students} allievi...", 5)
 
@@ -542,7 +546,8 @@ class CoursePresenter:
             print(f"Presenter Error (Student Add): {error_message}")
             self.view.show_message(
                 "student",
-                self._add_timestamp(error_message, operation_start_time)
+                self._add_timestamp(error_message, operation_start_time),
+                success=False
             )
 
         finally:
@@ -1,7 +1,12 @@
+import io
+import re
+import traceback
 import streamlit as st
+from collections import namedtuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+from calendar import monthrange
 from datetime import datetime, date, timedelta
-import pandas as pd
-import spacy
 from typing import Optional, Dict, Any, Tuple, List
 
 import presenter
@@ -9,9 +14,48 @@ from presenter import CoursePresenter
 import automation_lock   # <-- NEW: VM-global lock + heartbeat
 
 
+# ========== ACTIVITY RECORD ==========
+# WHY: activities_list used to be a list of 6-key dicts. A namedtuple is about
+# a third of the memory of an equivalent dict and gives attribute access
+# (act.title) to the model, which only reads these fields.
+Activity = namedtuple("Activity", ["title", "description", "date",
+                                   "start_time", "end_time", "impegno_previsto_in_ore"])
+
+
+# ========== AUTOMATION PAYLOADS ==========
+# WHY: edition_details / student_details are handed from the view to the
+# presenter through st.session_state. Slotted dataclasses are smaller than
+# the equivalent dicts and the fields are spelled out in one place.
+@dataclass(slots=True)
+class EditionDetails:
+    course_name: str
+    edition_title: str
+    edition_start_date: date
+    edition_end_date: date
+    location: str
+    supplier: str
+    price: str
+    description: str
+    activities: list = field(default_factory=list)
+    centro_costo: str = ''
+    direzione_pagante: str = ''
+    finanziata: str = ''
+    servizio_pagante: str = ''
+    sottotipologia: str = ''
+    societa_pagante: str = ''
+
+
+@dataclass(slots=True)
+class StudentDetails:
+    edition_code: str
+    students: list
+    data_scadenza: Optional[str] = None  # "GG/MM/AAAA"
+
+
 # NEW UTILITY FUNCTIONS FOR ENHANCED NLP PARSING
 #========== UTILITY 1: SAFE TEXT EXTRACTION ==========
-def safe_extract_text(original_text: str, normalized_text: str, match_start: int, match_end: int) -> str:
+def safe_extract_text(original_text: str, normalized_text: str, match_start: int, match_end: int,
+                      lengths_match: Optional[bool] = None) -> str:
     """
     Safely extract text from original while using match positions from normalized text.
 
@@ -23,31 +67,42 @@ def safe_extract_text(original_text: str, normalized_text: str, match_start: int
         normalized_text: The text used for pattern matching (lowercase, no accents)
         match_start: Start position from the regex match on normalized_text
         match_end: End position from the regex match on normalized_text
+        lengths_match: Precomputed len(original_text) == len(normalized_text);
+            callers extracting many matches from the same pair pass it once
 
     Returns:
         Extracted text from original, properly aligned
     """
     # VERIFICATION LENGTHS MATCH
-    if len(original_text) != len(normalized_text):
+    if lengths_match is None:
+        lengths_match = len(original_text) == len(normalized_text)
+    if not lengths_match:
         # If lengths differ (due to accent removal), fall back to normalized extraction
         return normalized_text[match_start:match_end].strip()
 
-    # SAFE EXTRACTION WITH BOUNDS CHECK ###
-    safe_start = max(0, match_start)
-    safe_end = min(len(original_text), match_end)
-
-    return original_text[safe_start:safe_end].strip()
+    # SAFE EXTRACTION: slicing already clamps the end; only a negative start
+    # would wrap around, so that is the one bound to check
+    return original_text[max(0, match_start):match_end].strip()
 
 # ========== UTILITY 2: ITALIAN MONTH NAME PARSER ==========
 ITALIAN_MONTHS = {
-    'gennaio': '01', 'febbraio': '02', 'marzo': '03', 'aprile': '04',
-    'maggio': '05', 'giugno': '06', 'luglio': '07', 'agosto': '08',
-    'settembre': '09', 'ottobre': '10', 'novembre': '11', 'dicembre': '12',
-    # Short forms
-    'gen': '01', 'feb': '02', 'mar': '03', 'apr': '04',
-    'mag': '05', 'giu': '06', 'lug': '07', 'ago': '08',
-    'set': '09', 'ott': '10', 'nov': '11', 'dic': '12'
+    name: f"{number:02d}"
+    for number, name in enumerate(
+        ('gennaio', 'febbraio', 'marzo', 'aprile', 'maggio', 'giugno', 'luglio',
+         'agosto', 'settembre', 'ottobre', 'novembre', 'dicembre'), start=1)
 }
+# Short forms are the first three letters (gen, feb, ..., dic)
+ITALIAN_MONTHS.update({name[:3]: number for name, number in list(ITALIAN_MONTHS.items())})
+
+# Month names spelled out in the pattern (longest first, so "marzo" wins over
+# "mar"): the scan only stops on a real Italian date, with no dict check on
+# arbitrary "<n> <word> <yyyy>" runs, and \b keeps "maggiore" from matching "mag"
+_ITALIAN_DATE_RE = re.compile(
+    r'(\d{1,2})\s+('
+    + '|'.join(sorted(ITALIAN_MONTHS, key=len, reverse=True))
+    + r')\b\s+(\d{4})',
+    re.IGNORECASE)
+
 
 def parse_italian_date(date_str: str) -> Optional[str]:
     """
@@ -62,25 +117,19 @@ def parse_italian_date(date_str: str) -> Optional[str]:
     Returns:
         Standardized date string in DD/MM/YYYY format, or None if parsing fails
     """
-    import re
-
-    # PATTERN FOR "12 gennaio 2024" FORMAT ###
-    month_name_pattern = r'(\d{1,2})\s+(\w+)\s+(\d{4})'
-    match = re.search(month_name_pattern, date_str.lower())
+    # PATTERN FOR "12 gennaio 2024" FORMAT (compiled once, module level) ###
+    # Only the captured month word is lowercased, not the whole input
+    match = _ITALIAN_DATE_RE.search(date_str)
 
     if match:
+        month = ITALIAN_MONTHS[match.group(2).lower()]
         day = match.group(1).zfill(2)  # Pad with zero: 5 → 05
-        month_name = match.group(2)
-        year = match.group(3)
-
-        if month_name in ITALIAN_MONTHS:
-            month = ITALIAN_MONTHS[month_name]
-            return f"{day}/{month}/{year}"
+        return f"{day}/{month}/{match.group(3)}"
 
     return None
 
 # ========== UTILITY 3: TWO-DIGIT YEAR NORMALIZATION ==========
-def normalize_two_digit_year(year_str: str) -> str:
+def normalize_two_digit_year(year_str: str) -> int:
     """
     Convert two-digit year to four-digit year using a pivot rule.
 
@@ -94,22 +143,92 @@ def normalize_two_digit_year(year_str: str) -> str:
         year_str: Two or four digit year as string
 
     Returns:
-        Four-digit year as string
+        Four-digit year as int (both callers build dates from it, so the
+        year is parsed once here instead of formatted and re-parsed)
     """
-    if len(year_str) == 4:
-        return year_str
+    year_int = int(year_str)
 
     if len(year_str) == 2:
-        year_int = int(year_str)
         # PIVOT RULE FOR CENTURY DETERMINATION ###
-        if year_int <= 69:
-            return f"20{year_str}"
-        else:
-            return f"19{year_str}"
+        return 2000 + year_int if year_int <= 69 else 1900 + year_int
 
-    return year_str
+    return year_int
 
 # ========== UTILITY 4: CENTRALIZED DATE NORMALIZATION ==========
+# Numeric formats accepted by normalize_date, matched with ONE regex each
+# instead of a strptime try/except ladder:
+#   15/03/2024  15-03-2024  15/03/24  15-03-24  15.03.2024  15 03 2024
+#   2024-03-15 (ISO format)
+_DMY_DATE_RE = re.compile(r'(\d{1,2})([/\-.]|\s+)(\d{1,2})([/\-.]|\s+)(\d{4}|\d{2})')
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+
+def _match_numeric_date(date_str: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Return (year, month, day) for the numeric formats above, else None.
+
+    Same acceptance as the old strptime list: both separators must be the
+    same kind, and two-digit years only with '/' or '-' (pivoted by
+    normalize_two_digit_year). The calendar check is left to the caller.
+    """
+    # DISPATCH ON SHAPE: four leading digits can only be ISO (a DMY day has
+    # at most two), so each input is tried against exactly one regex
+    if date_str[:4].isdigit():
+        m = _ISO_DATE_RE.fullmatch(date_str)
+        return None if m is None else (int(m[1]), int(m[2]), int(m[3]))
+
+    m = _DMY_DATE_RE.fullmatch(date_str)
+    if m is not None:
+        day, sep1, month, sep2, year = m.groups()
+        if sep1.isspace():
+            if not sep2.isspace() or len(year) != 4:
+                return None
+        elif sep1 != sep2 or (len(year) == 2 and sep1 == '.'):
+            return None
+        return normalize_two_digit_year(year), int(month), int(day)
+    return None
+
+
+# Day 0 of Excel's serial date system (as read by pandas/openpyxl)
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_date_str(date_value: str, default_format: str) -> Optional[str]:
+    """
+    String branch of normalize_date, cached per (string, format).
+
+    WHY: Excel batches and NLP re-parses hit the same few date strings over
+    and over; the result only depends on the two arguments. Call
+    _normalize_date_str.cache_clear() to reset it.
+    """
+    date_str = date_value.strip()
+
+    # Try Italian month names first
+    italian_date = parse_italian_date(date_str)
+    if italian_date:
+        return italian_date
+
+    # COMMON NUMERIC FORMATS: one regex match + int(), no strptime
+    ymd = _match_numeric_date(date_str)
+    if ymd is not None:
+        year, month, day = ymd
+        if (year >= 1 and 1 <= month <= 12
+                and 1 <= day <= monthrange(year, month)[1]):
+            return datetime(year, month, day).strftime(default_format)
+        # Impossible date (31/02/...): same as before, pandas decides
+
+    # FALLBACK - PANDAS TO_DATETIME (imported lazily: exotic inputs only)
+    import pandas as pd
+    try:
+        parsed = pd.to_datetime(date_str, dayfirst=True, errors='coerce')
+        if pd.notna(parsed):
+            return parsed.strftime(default_format)
+    except:
+        pass
+    return None
+
+
 def normalize_date(date_value: Any, default_format: str = "%d/%m/%Y") -> Optional[str]:
     """
     Universal date normalizer - handles ANY date format and converts to DD/MM/YYYY.
@@ -124,65 +243,299 @@ def normalize_date(date_value: Any, default_format: str = "%d/%m/%Y") -> Optiona
     Returns:
         Normalized date string or None if parsing fails
     """
-    # CASE 1 - ALREADY A DATETIME OBJECT
-    if isinstance(date_value, datetime):
-        return date_value.strftime(default_format)
-
-    # CASE 2 - PANDAS TIMESTAMP
-    if hasattr(date_value, 'strftime'):  # Pandas Timestamp
-        return date_value.strftime(default_format)
-
-    # CASE 3 - STRING WITH VARIOUS FORMATS
+    # CASE 1 - STRING WITH VARIOUS FORMATS (memoized: batch files repeat dates)
+    # Checked first: the most common input, and no attribute probing
     if isinstance(date_value, str):
-        date_str = date_value.strip()
-
-        # Try Italian month names first
-        italian_date = parse_italian_date(date_str)
-        if italian_date:
-            return italian_date
-
-        # TRY COMMON FORMATS IN ORDER
-        formats_to_try = [
-            "%d/%m/%Y",  # 15/03/2024
-            "%d-%m-%Y",  # 15-03-2024
-            "%d/%m/%y",  # 15/03/24
-            "%d-%m-%y",  # 15-03-24
-            "%Y-%m-%d",  # 2024-03-15 (ISO format)
-            "%d.%m.%Y",  # 15.03.2024
-            "%d %m %Y",  # 15 03 2024
-        ]
+        return _normalize_date_str(date_value, default_format)
 
-        for fmt in formats_to_try:
-            try:
-                parsed = datetime.strptime(date_str, fmt)
-                # HANDLE TWO-DIGIT YEARS
-                if fmt.endswith("%y"):
-                    year_normalized = normalize_two_digit_year(str(parsed.year)[-2:])
-                    parsed = parsed.replace(year=int(year_normalized))
-                return parsed.strftime(default_format)
-            except ValueError:
-                continue
+    # CASE 2 - DATETIME / DATE OBJECT
+    # pd.Timestamp subclasses datetime, which subclasses date: one isinstance
+    if isinstance(date_value, date):
+        return date_value.strftime(default_format)
 
-        # FALLBACK - PANDAS TO_DATETIME
+    # CASE 3 - NUMERIC (EXCEL SERIAL DATE)
+    # bool is an int subclass but never a date; NaN fails `x == x`
+    if isinstance(date_value, (int, float)) and not isinstance(date_value, bool):
+        if date_value != date_value:
+            return None
         try:
-            parsed = pd.to_datetime(date_str, dayfirst=True, errors='coerce')
-            if pd.notna(parsed):
-                return parsed.strftime(default_format)
-        except:
+            # Excel dates are days since 1899-12-30 (stdlib: no pandas objects)
+            return (_EXCEL_EPOCH + timedelta(days=date_value)).strftime(default_format)
+        except (OverflowError, ValueError):
             pass
+        return None
 
-    # CASE 4 - NUMERIC (EXCEL SERIAL DATE)
-    if isinstance(date_value, (int, float)):
-        try:
-            # Excel dates are days since 1899-12-30
-            parsed = pd.to_datetime('1899-12-30') + pd.Timedelta(days=date_value)
-            return parsed.strftime(default_format)
-        except:
-            pass
+    # CASE 4 - OTHER strftime-CAPABLE OBJECTS (pd.Period, ...): rare, so the
+    # duck-typing probe runs last instead of on every string
+    if hasattr(date_value, 'strftime'):
+        return date_value.strftime(default_format)
 
     return None
 
+# ========== SPACY MODEL (LAZY, SHARED) ==========
+# Components of it_core_news_sm the Matcher-based parsers never read
+_NLP_UNUSED_PIPES = ["tok2vec", "morphologizer", "tagger", "parser",
+                     "lemmatizer", "attribute_ruler", "ner", "senter"]
+
+@st.cache_resource(show_spinner=False)
+def _load_nlp():
+    """
+    Load the Italian spaCy model once per server process.
+
+    WHY: Loading it_core_news_sm takes seconds and ~100MB. The NLP parsers only
+    use the tokenizer + Matcher (LOWER/TEXT/IS_PUNCT/IS_ALPHA/REGEX, all
+    lexical), so the statistical components are excluded - not even loaded -
+    and the load only happens on the first NLP parse.
+
+    Returns:
+        The loaded model; a blank Italian pipeline (tokenizer only) if
+        it_core_news_sm is not installed; None if spaCy itself is missing
+    """
+    try:
+        import spacy
+    except ImportError:
+        return None
+    try:
+        return spacy.load("it_core_news_sm", exclude=_NLP_UNUSED_PIPES)
+    except OSError:
+        # Cached too: spacy.blank() is not free either
+        return spacy.blank("it")
+
+# ========== SESSION STATE DEFAULTS ==========
+# Seeded by CourseView.__init__ for every key not yet in st.session_state.
+_SESSION_DEFAULTS = {
+    # --- Basic App State ---
+    "app_state": "IDLE",
+    # === CONFIGURATION GUARD FOR CONTROLLER RUNS ===
+    "automation_in_progress": False,
+    # === AUTH STATE ===
+    "oracle_logged_in": False,
+    "oracle_username": None,
+    "oracle_password": None,
+    # --- Message States: COURSE ---
+    "course_message": "",
+    # COURSE INPUT METHOD
+    "course_input_method": "structured",  # Options: "structured", "excel", "nlp"
+    "course_edit_mode": False,
+    "courses_to_edit": [],
+    "course_parsed_data": None,  # Stores parsed data from Excel/NLP
+    "course_show_summary": False,  # Controls summary display
+    "course_nlp_input": "",  # Stores NLP text input
+    # BATCH PROCESSING STATE VARIABLES
+    "batch_course_data": None,
+    "batch_continue_on_error": True,
+    "batch_edition_data": None,
+    "batch_edition_results": [],
+    "show_edition_results": False,
+    # Bumped by "Cancella File" to hand the course uploader a fresh key
+    "course_excel_uploader_gen": 0,
+    # === EDITION INPUT METHOD STATES ===
+    "edition_input_method": "structured",  # "structured", "excel", "nlp"
+    "edition_parsed_data": None,
+    "edition_show_summary": False,
+    "edition_edit_mode": False,
+    "edition_to_edit": None,
+    "edition_nlp_input": "",
+    "edition_nlp_clear_requested": False,
+    # --- Message States: EDITION and STUDENTS ---
+    "edition_message": "",
+    "student_message": "",
+    "student_input_method": "txt",
+    "student_parsed_data": None,
+    "student_show_summary": False,
+    "batch_student_data": None,
+    "verify_student_data": None,
+    # --- Form Specific State ---
+    "num_activities": 1,
+    "num_students": 1,
+    # --- Preserved form data storage ---
+    "preserved_activity_data": {},
+    "preserved_student_data": {},
+    # presenza (+ multi-edition batch state)
+    "presenza_data": None,
+    "presenza_show_summary": False,
+    "presenza_message": "",
+    "presenza_batch_data": None,
+    "presenza_show_batch_preview": False,
+    # --- Initialize Widget States ---
+    "course_date_str_key": "01/01/2023",
+}
+
+# ========== FORM WIDGET KEYS ==========
+# Per-row widget keys formatted once at import; hot loops index these tuples
+# instead of building the same f-strings on every rerun.
+# Row order: title, desc, date, start_time, end_time, impegno_previsto_in_ore
+_ACTIVITY_FIELDS = ("activity_title_{0}", "activity_desc_{0}", "activity_date_{0}",
+                    "activity_start_time_{0}", "activity_end_time_{0}",
+                    "impegno_previsto_in_ore_{0}")
+_ACTIVITY_FIELD_DEFAULTS = ("", "", "", "09.00", "11.00", "")
+_ACTIVITY_KEYS = tuple(tuple(f.format(i) for f in _ACTIVITY_FIELDS) for i in range(30))
+_STUDENT_NAME_KEYS = tuple(f"student_name_{i}" for i in range(50))
+# Per-row (heading, date placeholder) text for the structured activity rows
+_ACTIVITY_ROW_LABELS = tuple((f"**Giorno {i + 1}**", f"Data giorno {i + 1}") for i in range(30))
+
+# Activity (30 rows) and student (50 rows) widget keys, seeded once per session
+_WIDGET_DEFAULTS = {}
+for _keys in _ACTIVITY_KEYS:
+    _WIDGET_DEFAULTS.update(zip(_keys, _ACTIVITY_FIELD_DEFAULTS))
+_WIDGET_DEFAULTS.update(dict.fromkeys(_STUDENT_NAME_KEYS, ""))
+del _keys
+
+
+# ========== OUTPUT SLOTS (form_type -> placeholder attr, message key) ==========
+# One dict lookup in update_progress / show_message instead of an if/elif
+# chain. Placeholders are re-created on every render, so the ATTRIBUTE NAME
+# is stored and resolved with getattr at call time.
+_OUTPUT_SLOTS = {
+    "course": ("course_output_placeholder", "course_message"),
+    "edition": ("edition_output_placeholder", "edition_message"),
+    "student": ("student_output_placeholder", "student_message"),
+}
+
+
+# ========== COURSE BATCH PREVIEW (course key -> table header) ==========
+_COURSE_PREVIEW_COLUMNS = {
+    'title': 'Titolo',
+    'short_description': 'Descrizione',
+    'start_date': 'Data Pubblicazione',
+    'row_number': 'Riga Excel',
+}
+
+# ========== INPUT METHOD LABELS (radio format_func) ==========
+# Built once instead of a new dict + lambda per option on every render
+_INPUT_LABELS = {
+    "structured": "📝 Input Strutturato (Form)",
+    "excel": "📊 Caricamento File Excel",
+    "nlp": "💬 Compilazione con AI",
+}
+_STUDENT_INPUT_LABELS = {
+    "txt": "📄 Caricamento File TXT",
+    "excel": "📊 Caricamento File Excel",
+    "nlp": "💬 Compilazione con AI",
+}
+
+# ========== LOGO (read once per server process) ==========
+@st.cache_resource(show_spinner=False)
+def _load_logo() -> bytes:
+    """Raw bytes of logo-agsm.jpg, so reruns don't re-open the file from disk."""
+    with open("logo-agsm.jpg", "rb") as f:
+        return f.read()
+
 # ========== UTILITY 5: EXTRACT WITH SPACY MATCHER ==========
+_DMY_RE = re.compile(r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b')
+
+# ========== SPACY MATCHERS (built once per vocab) ==========
+# (vocab id, pattern set) -> (vocab, Matcher); the vocab is kept to rule out
+# id() reuse. Matcher.add compiles every pattern, so this is done only once.
+_MATCHER_CACHE: Dict[Tuple[int, str], Tuple[Any, Any]] = {}
+
+
+def _get_matcher(vocab, name: str, patterns: Dict[str, List[List[Dict[str, Any]]]]):
+    """Return a Matcher with `patterns` ({label: variants}) for this vocab."""
+    key = (id(vocab), name)
+    cached = _MATCHER_CACHE.get(key)
+    if cached is not None and cached[0] is vocab:
+        return cached[1]
+
+    from spacy.matcher import Matcher
+    matcher = Matcher(vocab)
+    for label, variants in patterns.items():
+        matcher.add(label, variants)
+    _MATCHER_CACHE[key] = (vocab, matcher)
+    return matcher
+
+
+# Course keywords for extract_with_spacy_matcher
+_COURSE_MATCHER_PATTERNS = {
+    # Pattern: "titolo" + optional ":" + text until comma or end
+    'TITLE': [
+        [{"LOWER": "titolo"}, {"IS_PUNCT": True, "OP": "?"}, {"IS_ALPHA": True, "OP": "+"}],
+        [{"LOWER": "corso"}, {"IS_ALPHA": True, "OP": "+"}],
+    ],
+    'DESCRIPTION': [
+        [{"LOWER": "descrizione"}, {"IS_PUNCT": True, "OP": "?"}, {"IS_ALPHA": True, "OP": "+"}],
+    ],
+}
+
+# Edition field LABELS for _parse_edition_nlp_input
+# {field_name: list_of_pattern_variants}
+_EDITION_FIELD_PATTERNS = {
+    'corso': [
+        [{"LOWER": "corso"}],
+        [{"LOWER": "nome"}, {"LOWER": "corso"}],
+        [{"LOWER": "per"}, {"LOWER": "corso"}],
+    ],
+    'titolo': [
+        [{"LOWER": "titolo"}],
+        [{"LOWER": "titolo"}, {"LOWER": "edizione"}],
+    ],
+    'data_inizio': [
+        [{"LOWER": "data"}, {"LOWER": "inizio"}],
+        [{"LOWER": "inizio"}],
+        [{"LOWER": "dal"}],
+    ],
+    'data_fine': [
+        [{"LOWER": "data"}, {"LOWER": "fine"}],
+        [{"LOWER": "fine"}],
+        [{"LOWER": "al"}],
+    ],
+    'aula': [
+        [{"LOWER": "aula"}],
+        [{"LOWER": "luogo"}],
+        [{"LOWER": "sede"}],
+    ],
+    'fornitore': [
+        [{"LOWER": "fornitore"}],
+        [{"LOWER": "erogato"}, {"LOWER": "da"}],
+    ],
+    'costo': [
+        [{"LOWER": "costo"}],
+        [{"LOWER": "prezzo"}],
+        [{"LOWER": "€"}],
+    ],
+    'descrizione': [
+        [{"LOWER": "descrizione"}],
+        [{"LOWER": "desc"}],
+    ],
+    'centro_costo': [
+        [{"LOWER": "centro"}, {"LOWER": "di"}, {"LOWER": "costo"}],
+        [{"LOWER": "centro"}, {"LOWER": "costo"}],
+        [{"LOWER": "cdc"}],
+    ],
+    'societa_pagante': [
+        [{"LOWER": "società"}, {"LOWER": "pagante"}],
+        [{"LOWER": "societa"}, {"LOWER": "pagante"}],
+        [{"LOWER": "societa'"}, {"LOWER": "pagante"}],  # with apostrophe
+        [{"LOWER": "societa"}, {"IS_PUNCT": True, "OP": "?"}, {"LOWER": "pagante"}],
+        [{"TEXT": {"REGEX": "socie[tà]+"}, "OP": "?"}, {"LOWER": "pagante"}],
+    ],
+    'direzione_pagante': [
+        [{"LOWER": "direzione"}, {"LOWER": "pagante"}],
+    ],
+    'servizio_pagante': [
+        [{"LOWER": "servizio"}, {"LOWER": "pagante"}],
+    ],
+    'sottotipologia': [
+        [{"LOWER": "sottotipologia"}],
+        [{"LOWER": "sotto"}, {"LOWER": "tipologia"}],  # keeps two-word variant
+        [{"LOWER": "sottotipo"}],
+    ],
+    'finanziata': [
+        [{"LOWER": "finanziata"}],
+        [{"LOWER": "finanziato"}],
+    ],
+    'attivita_marker': [
+        [{"LOWER": "attività"}, {"IS_PUNCT": True, "OP": "?"}],
+        [{"LOWER": "attivita"}, {"IS_PUNCT": True, "OP": "?"}],
+        [{"LOWER": "attività"}, {"LOWER": ":"}],
+    ],
+}
+
+# Keyword tokens dropped from matched spans (frozenset: O(1) membership)
+_TITLE_STOPWORDS = frozenset({'titolo', 'corso', ':'})
+_DESC_STOPWORDS = frozenset({'descrizione', ':'})
+
+
 def extract_with_spacy_matcher(text: str, nlp_model) -> Dict[str, str]:
     """
     Use spaCy's Matcher for robust keyword-based extraction.
@@ -200,10 +553,8 @@ def extract_with_spacy_matcher(text: str, nlp_model) -> Dict[str, str]:
     Returns:
         Dictionary with extracted 'title', 'description', 'date'
     """
-    from spacy.matcher import Matcher
-
-    doc = nlp_model(text)
-    matcher = Matcher(nlp_model.vocab)
+    doc = nlp_model.make_doc(text)  # tokenizer only: patterns are lexical
+    matcher = _get_matcher(nlp_model.vocab, "course", _COURSE_MATCHER_PATTERNS)
 
     results = {
         'title': "",
@@ -211,22 +562,6 @@ def extract_with_spacy_matcher(text: str, nlp_model) -> Dict[str, str]:
         'date': ""
     }
 
-    # DEFINE PATTERNS FOR TITLE
-    # Pattern: "titolo" + optional ":" + text until comma or end
-    title_patterns = [
-        [{"LOWER": "titolo"}, {"IS_PUNCT": True, "OP": "?"}, {"IS_ALPHA": True, "OP": "+"}],
-        [{"LOWER": "corso"}, {"IS_ALPHA": True, "OP": "+"}],
-    ]
-
-    matcher.add("TITLE", title_patterns)
-
-    # DEFINE PATTERNS FOR DESCRIPTION
-    desc_patterns = [
-        [{"LOWER": "descrizione"}, {"IS_PUNCT": True, "OP": "?"}, {"IS_ALPHA": True, "OP": "+"}],
-    ]
-
-    matcher.add("DESCRIPTION", desc_patterns)
-
     # RUN MATCHER
     matches = matcher(doc)
 
@@ -236,170 +571,1012 @@ def extract_with_spacy_matcher(text: str, nlp_model) -> Dict[str, str]:
 
         if match_label == "TITLE" and not results['title']:
             # Extract tokens after "titolo" keyword
-            title_tokens = [token.text for token in span if token.lower_ not in ['titolo', 'corso', ':']]
-            results['title'] = ' '.join(title_tokens)
+            results['title'] = ' '.join(
+                token.text for token in span if token.lower_ not in _TITLE_STOPWORDS)
 
         elif match_label == "DESCRIPTION" and not results['description']:
-            desc_tokens = [token.text for token in span if token.lower_ not in ['descrizione', ':']]
-            results['description'] = ' '.join(desc_tokens)
+            results['description'] = ' '.join(
+                token.text for token in span if token.lower_ not in _DESC_STOPWORDS)
 
     # DATE EXTRACTION WITH REGEX (SPACY DOESN'T HANDLE THIS WELL)
-    import re
-    date_pattern = r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b'
-    date_match = re.search(date_pattern, text)
+    date_match = _DMY_RE.search(text)
     if date_match:
         results['date'] = date_match.group(1)
 
     return results
 
 
+
+# ========== EXCEL ENGINE (calamine when available) ==========
+@lru_cache(maxsize=None)
+def _excel_engine() -> str:
+    """
+    Engine name for pd.ExcelFile / pd.read_excel.
+
+    WHY: openpyxl builds a Python object per cell; calamine parses the sheet
+    in Rust and is several times faster on uploads. It needs pandas >= 2.2
+    and python-calamine, so fall back to openpyxl when either is missing.
+    The openpyxl fallback already streams: pandas opens the workbook with
+    read_only=True, data_only=True, keep_links=False.
+    """
+    import pandas as pd
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return 'openpyxl'
+    major, minor = (int(p) for p in pd.__version__.split('.')[:2])
+    return 'calamine' if (major, minor) >= (2, 2) else 'openpyxl'
+
+
+def _column_text(df, column: str, default: str = '', strip: bool = True):
+    """
+    One column as a Series of str() values, or the default when the column is missing.
+
+    WHY: same text as str(row.get(column, default)) per row, built once per
+    column instead of once per row Series (astype(str) would keep NaN as NaN
+    on newer pandas instead of 'nan').
+    """
+    import pandas as pd
+    if column not in df.columns:
+        return pd.Series([default] * len(df), index=df.index, dtype=object)
+    text = pd.Series([str(v) for v in df[column].tolist()], index=df.index, dtype=object)
+    return text.str.strip() if strip else text
+
+
+def _column_dates(df, column: str) -> List[Optional[str]]:
+    """normalize_date over one column (over '' when the column is missing)."""
+    if column not in df.columns:
+        return [normalize_date('')] * len(df)
+    return [normalize_date(v) for v in df[column].tolist()]
+
+
+def _excel_time_text(value) -> str:
+    """Time cell as "HH.MM": numeric hours (9.5 -> "09.30") or "09:00"-style text."""
+    if isinstance(value, (int, float)):
+        hours = int(value)
+        minutes = int((value - hours) * 60)
+        return f"{hours:02d}.{minutes:02d}"
+    return str(value).replace(':', '.')
+
+
+def _excel_time_texts(column) -> List[str]:
+    """
+    _excel_time_text over a whole column.
+
+    WHY: a fully numeric column (hours typed as 9.5) is split into hours and
+    minutes with two NumPy ops instead of an isinstance branch per cell.
+    Text, mixed or incomplete columns keep the per-cell path.
+    """
+    import numpy as np
+    import pandas as pd
+    if not pd.api.types.is_numeric_dtype(column) or column.isna().any():
+        return [_excel_time_text(v) for v in column.tolist()]
+    values = column.to_numpy(dtype=np.float64)
+    hours = values.astype(np.int64)  # truncates like int()
+    minutes = ((values - hours) * 60).astype(np.int64)
+    return [f"{h:02d}.{m:02d}" for h, m in zip(hours.tolist(), minutes.tolist())]
+
+
+def _open_excel_file(uploaded_file):
+    """
+    pd.ExcelFile on the fastest engine, retrying with openpyxl if it refuses the file.
+
+    WHY: calamine is stricter than openpyxl about some hand-edited or
+    third-party .xlsx files. Retrying keeps such uploads working instead of
+    failing the whole import.
+    """
+    import pandas as pd
+    engine = _excel_engine()
+    try:
+        return pd.ExcelFile(uploaded_file, engine=engine)
+    except Exception:
+        if engine == 'openpyxl':
+            raise
+        uploaded_file.seek(0)
+        return pd.ExcelFile(uploaded_file, engine='openpyxl')
+
+
+def _normalized_columns(columns) -> List[str]:
+    """
+    Header names stripped and lowercased in ONE pass.
+
+    WHY: columns.str.strip().str.lower() builds two intermediate Index objects
+    and turns non-text headers (numbers, dates) into NaN. A list keeps every
+    header as a comparable string.
+    """
+    return [c.strip().lower() if isinstance(c, str) else str(c).strip().lower()
+            for c in columns]
+
+
+# ========== COURSE EXCEL PARSING (cached on file bytes) ==========
+# Expected columns: (field, accepted header names in priority order).
+# A module-level table instead of a dict rebuilt on every parse.
+_COURSE_EXCEL_COLUMNS = (
+    ('title', ('nome corso', 'titolo', 'corso', 'nome', 'title')),
+    ('description', ('descrizione', 'desc', 'breve descrizione', 'description')),
+    ('date', ('data inizio pubblicazione', 'data pubblicazione', 'data inizio',
+              'data', 'pubblicazione', 'date', 'start date')),
+)
+# Skipped-row reason codes: the cached parser stores (row, code, value)
+# tuples; the message text is formatted only when the warning is rendered.
+_SKIP_NO_TITLE, _SKIP_NO_DESCRIPTION, _SKIP_NO_DATE, _SKIP_BAD_DATE = range(4)
+_SKIP_REASON_TEXT = (
+    "Titolo mancante",
+    "Descrizione mancante",
+    "Data mancante",
+    "Formato data non valido ({})",
+)
+# Inverted once: header name -> (field, alias priority)
+_COURSE_ALIAS_TO_FIELD = {
+    alias: (field_name, rank)
+    for field_name, aliases in _COURSE_EXCEL_COLUMNS
+    for rank, alias in enumerate(aliases)
+}
+
+def _course_row_reasons(titles: List[str], descriptions: List[str],
+                        raw_dates: List[Any]):
+    """
+    Skip reason per course row as an int8 array (-1 = row is complete).
+
+    WHY: three whole-column comparisons instead of a branchy check per row.
+    Assigned from the last check to the first, so a row missing several
+    fields reports the first one (title, then description, then date).
+    """
+    import numpy as np
+
+    n = len(titles)
+    reasons = np.full(n, -1, dtype=np.int8)
+    reasons[np.fromiter((d is None for d in raw_dates), dtype=bool, count=n)] = _SKIP_NO_DATE
+    reasons[np.array(descriptions, dtype=object) == ""] = _SKIP_NO_DESCRIPTION
+    reasons[np.array(titles, dtype=object) == ""] = _SKIP_NO_TITLE
+    return reasons
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _parse_course_excel_bytes(data: bytes) -> Dict[str, Any]:
+    """
+    Pure part of the course Excel import: read the table, map columns, build courses.
+
+    WHY: Streamlit reruns the script on every click. cache_data hashes the file
+    bytes, so the same upload is parsed only once. The sheet is a plain table
+    of 3 useful columns, so it is streamed with openpyxl in read-only mode
+    instead of building a DataFrame. No st.* calls here - the caller renders
+    the messages from the returned dict.
+
+    Returns:
+        Dict with 'columns' (normalized headers), 'missing_columns', 'courses'
+        and 'skipped_rows' ((row_number, reason code, cell value) tuples)
+    """
+    import numpy as np
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]  # same sheet pandas' sheet_name=0 would read
+        rows = ws.iter_rows(values_only=True)
+
+        # READ THE HEADER ROW
+        header = next(rows, ())
+
+        # NORMALIZE COLUMN NAMES
+        # Remove extra spaces, convert to lowercase for matching
+        index_by_name = {}
+        for col_idx, col in enumerate(header):
+            name = str(col).strip().lower() if col is not None else f"unnamed: {col_idx}"
+            index_by_name.setdefault(name, col_idx)
+        columns = list(index_by_name)
+
+        # FIND ACTUAL COLUMN NAMES IN FILE: one pass over the headers;
+        # per field, the highest-priority alias present wins
+        best = {}
+        for name, col_idx in index_by_name.items():
+            hit = _COURSE_ALIAS_TO_FIELD.get(name)
+            if hit is not None:
+                field_name, rank = hit
+                if field_name not in best or rank < best[field_name][0]:
+                    best[field_name] = (rank, col_idx)
+        found_columns = {field_name: col_idx for field_name, (_, col_idx) in best.items()}
+
+        result = {
+            'columns': columns,
+            'missing_columns': [f for f in ('title', 'description', 'date') if f not in found_columns],
+            'courses': [],
+            'skipped_rows': [],
+        }
+        if result['missing_columns']:
+            return result
+
+        # EXTRACT ALL COURSES FROM ROWS
+        courses_list = result['courses']
+        skipped_rows = result['skipped_rows']
+        title_idx = found_columns['title']
+        desc_idx = found_columns['description']
+        date_idx = found_columns['date']
+
+        # Excel row numbers: header is row 1, data starts at row 2.
+        # Short rows (trailing empty cells) are padded with None.
+        # Collected column-wise (parallel lists, no per-row tuple) so the date
+        # column goes to pandas as-is and the checks below zip the columns.
+        row_numbers, titles, descriptions, raw_dates = [], [], [], []
+        for row_number, row in enumerate(rows, start=2):
+            title_val = row[title_idx] if title_idx < len(row) else None
+            desc_val = row[desc_idx] if desc_idx < len(row) else None
+            date_val = row[date_idx] if date_idx < len(row) else None
+
+            #SKIP EMPTY ROWS (before any per-cell work)
+            if title_val is None and desc_val is None and date_val is None:
+                continue  # Skip completely empty rows
+
+            # Clean the text cells ONCE: checks and course dict reuse them
+            row_numbers.append(row_number)
+            titles.append(str(title_val).strip() if title_val is not None else "")
+            descriptions.append(str(desc_val).strip() if desc_val is not None else "")
+            raw_dates.append(date_val)
+
+        # PARSE THE WHOLE DATE COLUMN IN ONE VECTORIZED CALL
+        # WHY: Excel date cells and DD/MM/YYYY strings (the common cases) are
+        # converted by pandas in C. Anything it can't read (NaT) still goes
+        # through normalize_date below (Italian months, 2-digit years, ...).
+        parsed_dates = pd.to_datetime(pd.Series(raw_dates, dtype=object),
+                                      format="%d/%m/%Y", errors="coerce", cache=True)
+
+        # VALIDATE ALL ROWS AT ONCE: one reason code per row (-1 = valid)
+        reasons = _course_row_reasons(titles, descriptions, raw_dates)
+        # strftime over the whole column; NaT rows come back as NaN
+        formatted_dates = parsed_dates.dt.strftime("%d/%m/%Y").tolist()
+
+        for i in np.flatnonzero(reasons >= 0).tolist():
+            skipped_rows.append((row_numbers[i], int(reasons[i]), None))
+
+        # normalize_date only runs for valid rows pandas could not read
+        # (Italian months, 2-digit years, ...)
+        for i in np.flatnonzero(reasons < 0).tolist():
+            normalized_date = formatted_dates[i]
+            if not isinstance(normalized_date, str):
+                normalized_date = normalize_date(raw_dates[i])
+
+            if not normalized_date:
+                skipped_rows.append((row_numbers[i], _SKIP_BAD_DATE, raw_dates[i]))
+                continue
+
+            # ADD VALID COURSE TO LIST
+            courses_list.append({
+                'title': titles[i],
+                'short_description': descriptions[i],
+                'start_date': normalized_date,
+                'programme': "",  # Optional field, empty for now
+                'row_number': row_numbers[i]  # Excel row number for reference
+            })
+
+        # Keep the skipped rows in sheet order for the warning
+        skipped_rows.sort(key=lambda skip: skip[0])
+
+        return result
+    finally:
+        wb.close()
+
+
+# ========== COURSE NLP PATTERNS (compiled once) ==========
+# WHY: _parse_nlp_input runs on every "Analizza" click. Compiling here skips
+# the re module's cache lookup + argument parsing on each search.
+# One alternation with a named group per keyword: a single finditer pass
+# replaces one full scan of the sentence per keyword.
+_NLP_KEYWORDS_RE = re.compile(
+    r'(?P<titolo>\btitolo\b)'
+    r'|(?P<descrizione>\bdescrizione(?:\s+breve)?\b)'
+    r'|(?P<data>\bdata(?:\s+(?:di\s+)?(?:inizio|pubblicazione))?\b|\bpubblicazione\b)'
+    r'|(?P<programma>\bprogramma\b)')
+# Values are already .strip()-ed when this runs, so a single \s before the
+# connector is enough (the caller strips again). The old \s+...\s*$ form
+# re-scanned every whitespace run from each start position.
+_NLP_TRAILING_CONNECTOR_RE = re.compile(r'\s(?:con|e|ed)$', re.IGNORECASE)
+_NLP_VALUE_DATE_RE = re.compile(r'(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4})')
+_NLP_ANY_DATE_RE = re.compile(r'\b(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4})\b')
+_NLP_CORSO_RE = re.compile(
+    r'\bcorso\s+(.+?)'
+    r'(?=\s+descrizione|\s+data\s|\s+pubblicazione'
+    r'|\s+programma|\s+con\s+descrizione|$)',
+    re.IGNORECASE)
+
+
+# ========== COURSE NLP PARSING (cached on the sentence) ==========
+@st.cache_data(show_spinner=False, max_entries=32)
+def _parse_course_nlp_text(text: str) -> Dict[str, str]:
+    """
+    Pure part of the course NLP parser (steps 1-4 of CourseView._parse_nlp_input).
+
+    WHY: parsing is deterministic on the sentence, so a module function can be
+    memoized by st.cache_data - re-analysing the same text skips the regex work.
+    No st.* calls here.
+
+    Returns:
+        Dict with 'title', 'short_description', 'start_date', 'programme'
+        ('' for anything not found)
+    """
+    parsed_data = {
+        'title': "",
+        'short_description': "",
+        'start_date': "",
+        'programme': ""
+    }
+
+    original_text = text
+    text_lower = text.lower()
+    # Matches run on text_lower but values are cut from original_text.
+    # str.lower() can change the length (e.g. 'İ'), shifting every offset:
+    # checked ONCE here, then each safe_extract_text call is a plain slice
+    lengths_match = len(text_lower) == len(original_text)
+
+    # ═══════════════════════════════════════════════════
+    # STEP 1: Find positions of each keyword
+    # ═══════════════════════════════════════════════════
+    positions = {}
+    for match in _NLP_KEYWORDS_RE.finditer(text_lower):
+        # Keep only the FIRST occurrence of each keyword
+        if match.lastgroup not in positions:
+            positions[match.lastgroup] = {
+                'start': match.start(),
+                'end': match.end()
+            }
+
+    # ═══════════════════════════════════════════════════
+    # STEP 2: Sort keywords by position and extract values between them
+    # ═══════════════════════════════════════════════════
+    sorted_keys = sorted(positions.keys(),
+                         key=lambda k: positions[k]['start'])
+
+    for i, key in enumerate(sorted_keys):
+        value_start = positions[key]['end']
+        if i + 1 < len(sorted_keys):
+            value_end = positions[sorted_keys[i + 1]]['start']
+        else:
+            value_end = len(text_lower)
+
+        value = safe_extract_text(original_text, text_lower, value_start, value_end,
+                                  lengths_match)
+        # Strip trailing connectors and punctuation
+        value = _NLP_TRAILING_CONNECTOR_RE.sub('', value).strip()
+        value = value.strip(' ,;:-')
+
+        if key == 'titolo':
+            parsed_data['title'] = value
+        elif key == 'descrizione':
+            parsed_data['short_description'] = value
+        elif key == 'data':
+            # Find numeric date inside the slice
+            date_match = _NLP_VALUE_DATE_RE.search(value)
+            if date_match:
+                parsed_data['start_date'] = normalize_date(date_match.group(1)) or ''
+            else:
+                # Try Italian month name (e.g., "12 marzo 2024")
+                italian = parse_italian_date(value)
+                if italian:
+                    parsed_data['start_date'] = italian
+        elif key == 'programma':
+            parsed_data['programme'] = value
+
+    # ═══════════════════════════════════════════════════
+    # STEP 3: FALLBACK — "corso X" pattern if 'titolo' keyword not used
+    # Example: "Crea un corso Excel Base data 01/01/2024"
+    # ═══════════════════════════════════════════════════
+    if not parsed_data['title']:
+        corso_match = _NLP_CORSO_RE.search(text_lower)
+        if corso_match:
+            value = safe_extract_text(original_text, text_lower, corso_match.start(1),
+                                      corso_match.end(1), lengths_match)
+            value = _NLP_TRAILING_CONNECTOR_RE.sub('', value).strip()
+            value = value.strip(' ,;:-')
+            if value:
+                parsed_data['title'] = value
+
+    # ═══════════════════════════════════════════════════
+    # STEP 4: FALLBACK — find date anywhere in text
+    # if 'data' keyword wasn't found at all
+    # ═══════════════════════════════════════════════════
+    if not parsed_data['start_date']:
+        # Try Italian month names anywhere in text
+        italian = parse_italian_date(text_lower)
+        if italian:
+            parsed_data['start_date'] = italian
+        else:
+            # Try numeric date anywhere
+            date_match = _NLP_ANY_DATE_RE.search(original_text)
+            if date_match:
+                parsed_data['start_date'] = normalize_date(date_match.group(1)) or ''
+
+    return parsed_data
+
+
+# ========== EDITION NLP PATTERNS (compiled once) ==========
+# WHY: _parse_edition_nlp_text builds ~20 searches per parse; compiled here,
+# a cache miss skips re's pattern-cache lookup and flag parsing for each.
+_ED_LEADING_PUNCT_RE = re.compile(r'^[\s:,\-–]+')
+_ED_TRAILING_PUNCT_RE = re.compile(r'[\s,]+$')
+# Each stop lookahead matches the whitespace ONCE before a single keyword
+# alternation, instead of re-scanning it in every branch at each lazy step.
+_ED_CORSO_RE = re.compile(
+    r'(?:per\s+)?corso\s+(.+?)'
+    r'(?=\s+(?:titolo\s|data\s+(?:inizio|fine)|aula\s|fornitore\s|costo\s)|$)',
+    re.IGNORECASE)
+_ED_TITOLO_RE = re.compile(
+    r'\btitolo\s+(.+?)'
+    r'(?=\s+(?:data\s+(?:inizio|fine)|aula\s|fornitore\s|costo\s)|$)',
+    re.IGNORECASE)
+_ED_DATA_INIZIO_RE = re.compile(
+    r'data\s+inizio\s+(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{4})', re.IGNORECASE)
+_ED_DATA_FINE_RE = re.compile(
+    r'data\s+fine\s+(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{4})', re.IGNORECASE)
+_ED_AULA_RE = re.compile(
+    r'\baula\s+(.+?)'
+    r'(?=\s+(?:fornitore\s|costo\s|con\s|attività)|$)',
+    re.IGNORECASE)
+_ED_FORNITORE_RE = re.compile(
+    r'\bfornitore\s+(.+?)'
+    r'(?=\s+(?:costo\s|con\s|aula\s|attività)|$)',
+    re.IGNORECASE)
+_ED_COSTO_RE = re.compile(r'\bcosto\s+(\d+(?:[.,]\d+)?)', re.IGNORECASE)
+# "Attributi aggiuntivi": the text after "con" (or after the price) up to
+# the activity list, then one pattern per field inside it
+_ED_AGGIUNTIVI_RE = re.compile(
+    r'\bcon\b(.+?)(?=attività\s*:|attivita\s*:|$)', re.IGNORECASE | re.DOTALL)
+_ED_COSTO_TAIL_RE = re.compile(
+    r'costo\s+\d+(.+?)(?=attività\s*:|attivita\s*:|$)', re.IGNORECASE | re.DOTALL)
+_ED_CENTRO_COSTO_RE = re.compile(
+    r'centro\s+di\s+costo\s*[-–:]\s*([^,\n]+?)(?=\s*\w+\s*pagante|,|attività|$)',
+    re.IGNORECASE | re.DOTALL)
+_ED_DIREZIONE_RE = re.compile(
+    r'direzione\s+pagante\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)', re.IGNORECASE | re.DOTALL)
+_ED_FINANZIATA_RE = re.compile(
+    r'finanziata\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)', re.IGNORECASE | re.DOTALL)
+_ED_SERVIZIO_RE = re.compile(
+    r'servizio\s+pagante\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)', re.IGNORECASE | re.DOTALL)
+_ED_SOTTOTIPOLOGIA_RE = re.compile(
+    r'sottotipologia\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)', re.IGNORECASE | re.DOTALL)
+# No '.' in the pattern, so DOTALL is a no-op: the same object also serves
+# the whole-text fallback search
+_ED_SOCIETA_RE = re.compile(
+    r"socie(?:t[aà]['\u2019]?)\s*pagante\s*[-–:]\s*([^,\n]+?)(?=\s*attività|\s*attivita|,|$)",
+    re.IGNORECASE | re.DOTALL)
+_ED_ATTIVITA_RE = re.compile(r'attività\s*[:\-]\s*(.+?)$', re.IGNORECASE | re.DOTALL)
+_ED_ACTIVITY_RE = re.compile(
+    r'([^,]+?)'  # title
+    r'(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{4})'  # date
+    r'[^0-9]*ore\s*'  # 'ore' keyword
+    r'(\d{1,2}[.:]\d{2})'  # start time
+    r'\s*[-–]\s*'  # separator
+    r'(\d{1,2}[.:]\d{2})'  # end time
+    r'(?:[^,\d]*?(\d+(?:[.,]\d+)?)\s*ore)?',  # ★ optional impegno
+    re.IGNORECASE)
+_ED_ATTIVITA_TAIL_RE = re.compile(r'\battività\b.*', re.IGNORECASE)
+
+# Regex-only fallback parser (_parse_edition_nlp_input_regex). IGNORECASE
+# on the original text replaces a lowercased copy of the whole input.
+_EDR_COURSE_RES = (
+    re.compile(r'(?:corso|per corso|del corso)\s+["\']?([^"\']+?)["\']?\s+(?:titolo|data|edizione)',
+               re.IGNORECASE),
+    re.compile(r'corso\s+([A-Za-z0-9\s]+?)(?:\s+titolo|\s+data|\s+edizione|,|$)', re.IGNORECASE),
+)
+_EDR_TITLE_RES = (
+    re.compile(r'titolo\s+["\']?([^"\']+?)["\']?\s+(?:data|aula|fornitore|attività)', re.IGNORECASE),
+    re.compile(r'titolo\s+([^,]+?)(?:,|\s+data)', re.IGNORECASE),
+)
+_EDR_DATE_RE = re.compile(r'(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})')
+_EDR_START_RE = re.compile(r'(?:data\s+)?inizio\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})', re.IGNORECASE)
+_EDR_END_RE = re.compile(r'(?:data\s+)?fine\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})', re.IGNORECASE)
+_EDR_LOCATION_RE = re.compile(r'aula\s+([^,]+?)(?:,|\s+fornitore|\s+costo|\s+attività|$)',
+                              re.IGNORECASE)
+_EDR_SUPPLIER_RE = re.compile(r'fornitore\s+([^,]+?)(?:,|\s+costo|\s+aula|\s+attività|$)',
+                              re.IGNORECASE)
+_EDR_PRICE_RE = re.compile(r'(?:costo|prezzo)\s+(\d+)', re.IGNORECASE)
+_EDR_CENTRO_COSTO_RE = re.compile(
+    r'centro\s+di\s+costo\s*[-–:]\s*([^,]+?)(?:,|\s+direzione|\s+finanziata|$)', re.IGNORECASE)
+_EDR_DIREZIONE_RE = re.compile(
+    r'direzione\s+pagante\s*[-–:]\s*([^,]+?)(?:,|\s+finanziata|\s+servizio|$)', re.IGNORECASE)
+_EDR_FINANZIATA_RE = re.compile(r'finanziata\s*[-–:]\s*(s[iì]|no)', re.IGNORECASE)
+_EDR_SERVIZIO_RE = re.compile(
+    r'servizio\s+pagante\s*[-–:]\s*([^,]+?)(?:,|\s+sottotipologia|\s+societ|$)', re.IGNORECASE)
+_EDR_SOTTOTIPOLOGIA_RE = re.compile(
+    r'sottotipologia\s*[-–:]\s*([^,]+?)(?:,|\s+societ|$)', re.IGNORECASE)
+_EDR_SOCIETA_RE = re.compile(
+    r"societ[àa]['\u2019]?\s+pagante\s*[-–:]\s*([^,]+?)(?:,|\s+attivit|$)", re.IGNORECASE)
+_EDR_ACTIVITY_SECTION_RE = re.compile(r'attività[:\s]+(.+)', re.IGNORECASE | re.DOTALL)
+_EDR_ACTIVITY_RES = (
+    # Pattern A: "primo giorno 12/02/2026 ore 09.00-11.00 [impegno N ore]"
+    re.compile(r'(\w+\s+giorno)\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})'
+               r'\s+(?:ore\s+)?(\d{1,2}[.:]\d{2})\s*[-–]\s*(\d{1,2}[.:]\d{2})'
+               r'(?:[^,\d]*?(\d+(?:[.,]\d+)?)\s*ore)?', re.IGNORECASE),
+    # Pattern B: "giorno 1 12/02/2026 ore 09.00-11.00 [impegno N ore]"
+    re.compile(r'(giorno\s+\d+|day\s+\d+)\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})'
+               r'\s+(?:ore\s+)?(\d{1,2}[.:]\d{2})\s*[-–]\s*(\d{1,2}[.:]\d{2})'
+               r'(?:[^,\d]*?(\d+(?:[.,]\d+)?)\s*ore)?', re.IGNORECASE),
+)
+_EDR_DAYS_RE = re.compile(r'(\d+)\s+(?:giorni|days|attività)', re.IGNORECASE)
+
+
+# ========== EDITION NLP PARSING (cached on the sentence) ==========
+@st.cache_data(show_spinner=False, max_entries=32)
+def _parse_edition_nlp_text(text: str) -> Dict[str, Any]:
+    """
+    Pure part of the spaCy edition parser (CourseView._parse_edition_nlp_input).
+
+    WHY: like _parse_course_nlp_text - the result depends only on the sentence,
+    so re-analysing the same text skips tokenizing, matching and ~20 regex
+    searches. No st.* calls here; the caller reports missing fields.
+
+    Returns:
+        The edition dict; 'course_name', 'start_date' and 'end_date' are ''
+        when not found (dates already normalized to DD/MM/YYYY)
+    """
+    # =========================================================
+    # STEP 1: Load the Italian spaCy model (cached across reruns)
+
+    nlp = _load_nlp()  # never None here: the caller checked spaCy imports
+
+    # =========================================================
+    # STEP 2: Process the text
+    # make_doc = tokenizer only; the field patterns are all lexical
+    doc = nlp.make_doc(text.lower())  # lowercase for case-insensitive matching
+
+    # =========================================================
+    # STEP 3: Field label patterns (_EDITION_FIELD_PATTERNS) in a spaCy
+    # Matcher built once per vocab, not once per parse
+    matcher = _get_matcher(nlp.vocab, "edition_fields", _EDITION_FIELD_PATTERNS)
+
+    # =========================================================
+    # STEP 4: Run the matcher and collect all matches with positions
+    matches = matcher(doc)
+
+    # =========================================================
+    # STEP 5: Convert matches to character positions
+    field_positions = {}  # {field_name: char_position_after_label}
+
+    for match_id, start, end in matches:
+        field_name = nlp.vocab.strings[match_id]
+        # doc[end-1].idx = start of last token, doc[end-1].__len__ = length
+        last_token = doc[end - 1]
+        char_pos_after_label = last_token.idx + len(last_token.text)
+
+        # Keep only the FIRST occurrence of each field
+        if field_name not in field_positions:
+            field_positions[field_name] = char_pos_after_label
+
+    # =========================================================
+    # STEP 6: Sort fields by position in text
+    original_text = text
+
+    sorted_fields = sorted(field_positions.items(), key=lambda x: x[1])
+
+    def extract_value_between(start_pos, end_pos=None):
+        if end_pos:
+            raw = original_text[start_pos:end_pos]
+        else:
+            raw = original_text[start_pos:]
+        raw = _ED_LEADING_PUNCT_RE.sub('', raw)
+        raw = _ED_TRAILING_PUNCT_RE.sub('', raw)
+        if len(raw.strip()) < 2:
+            return ''
+        return raw.strip()
+
+    # ✅ FUNCTION ENDS HERE — next lines are at function level
+
+    # =========================================================
+    # STEP 7: Extract simple fields using spaCy positions
+    # =========================================================
+    extracted = {}
+
+    simple_fields = ['corso', 'titolo', 'data_inizio', 'data_fine',
+                     'aula', 'fornitore', 'costo', 'descrizione']
+
+    simple_positions = [(f, p) for f, p in sorted_fields
+                        if f in simple_fields]
+
+    for i, (field_name, start_pos) in enumerate(simple_positions):
+        end_pos = None
+        if i + 1 < len(simple_positions):
+            next_field_name, _ = simple_positions[i + 1]
+            next_patterns = _EDITION_FIELD_PATTERNS.get(next_field_name, [])
+            for pattern in next_patterns:
+                candidate = ' '.join(
+                    p.get('LOWER', '') for p in pattern
+                    if p.get('LOWER'))
+                if not candidate:
+                    continue
+                idx = original_text.lower().find(
+                    candidate.lower(), start_pos)
+                if idx != -1:
+                    end_pos = idx
+                    break
+        value = extract_value_between(start_pos, end_pos)
+        extracted[field_name] = value
+
+    # =========================================================
+    # OVERRIDE: Extract all simple fields with regex
+    # =========================================================
+    corso_match = _ED_CORSO_RE.search(original_text)
+    if corso_match:
+        extracted['corso'] = corso_match.group(1).strip()
+
+    titolo_match = _ED_TITOLO_RE.search(original_text)
+    if titolo_match:
+        extracted['titolo'] = titolo_match.group(1).strip()
+
+    data_inizio_match = _ED_DATA_INIZIO_RE.search(original_text)
+    if data_inizio_match:
+        extracted['data_inizio'] = data_inizio_match.group(1)
+
+    data_fine_match = _ED_DATA_FINE_RE.search(original_text)
+    if data_fine_match:
+        extracted['data_fine'] = data_fine_match.group(1)
+
+    aula_match = _ED_AULA_RE.search(original_text)
+    if aula_match:
+        extracted['aula'] = aula_match.group(1).strip()
+
+    fornitore_match = _ED_FORNITORE_RE.search(original_text)
+    if fornitore_match:
+        extracted['fornitore'] = fornitore_match.group(1).strip()
+
+    costo_match_val = _ED_COSTO_RE.search(original_text)
+    if costo_match_val:
+        extracted['costo'] = costo_match_val.group(1)
+
+    # =========================================================
+    # STEP 8: Parse attributi aggiuntivi with REGEX
+    # =========================================================
+    aggiuntivi_raw = ''
+
+    aggiuntivi_match = _ED_AGGIUNTIVI_RE.search(original_text)
+
+    if aggiuntivi_match:
+        aggiuntivi_raw = aggiuntivi_match.group(1)
+    else:
+        costo_fallback = _ED_COSTO_TAIL_RE.search(original_text)
+        if costo_fallback:
+            aggiuntivi_raw = costo_fallback.group(1)
+
+    def extract_aggiuntivi_field(pattern, text):
+        m = pattern.search(text)
+        if not m:
+            return ''
+        return text[m.start(1):m.end(1)].strip().strip(',').strip()
+
+    centro_costo = extract_aggiuntivi_field(_ED_CENTRO_COSTO_RE, aggiuntivi_raw)
+
+    direzione_pagante = extract_aggiuntivi_field(_ED_DIREZIONE_RE, aggiuntivi_raw)
+
+    finanziata_raw = extract_aggiuntivi_field(_ED_FINANZIATA_RE, aggiuntivi_raw)
+
+    servizio_pagante = extract_aggiuntivi_field(_ED_SERVIZIO_RE, aggiuntivi_raw)
+
+    sottotipologia = extract_aggiuntivi_field(_ED_SOTTOTIPOLOGIA_RE, aggiuntivi_raw)
+
+    societa_pagante = extract_aggiuntivi_field(_ED_SOCIETA_RE, aggiuntivi_raw)
+
+    if not societa_pagante:
+        societa_fallback = _ED_SOCIETA_RE.search(original_text)
+        if societa_fallback:
+            societa_pagante = original_text[
+                              societa_fallback.start(1):societa_fallback.end(1)
+                              ].strip().strip(',').strip()
+    if finanziata_raw.lower() in ['si', 'sì', 'yes', 's']:
+        finanziata_val = 'Sì'
+    elif finanziata_raw.lower() in ['no', 'n']:
+        finanziata_val = 'No'
+    else:
+        finanziata_val = finanziata_raw.strip()
+
+    # =========================================================
+    # STEP 9: Parse activities
+    # =========================================================
+    activities = []
+    attivita_match = _ED_ATTIVITA_RE.search(original_text)
+
+    if attivita_match:
+        activities_text = attivita_match.group(1)
+        for match in _ED_ACTIVITY_RE.finditer(activities_text):
+            title = match.group(1).strip().strip(',').strip()
+            date_str = normalize_date(match.group(2))
+            start_time = match.group(3).replace(':', '.')
+            end_time = match.group(4).replace(':', '.')
+            impegno_val = match.group(5) if match.group(5) else ''  # ★ NEW
+            if title and date_str:
+                activities.append({
+                    'title': title,
+                    'description': '',
+                    'date': date_str,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'impegno_ore': impegno_val  # ★ was ''
+                })
+    # =========================================================
+    # STEP 10: Clean and build final result
+    # =========================================================
+    def clean(val):
+        if not val:
+            return ''
+        val = _ED_ATTIVITA_TAIL_RE.sub('', val).strip()
+        return val.strip(' ,;:-–')
+
+    course_name = clean(extracted.get('corso', ''))
+    start_date = clean(extracted.get('data_inizio', ''))
+    end_date = clean(extracted.get('data_fine', ''))
+
+    return {
+        'course_name': course_name,
+        'edition_title': clean(extracted.get('titolo', '')),
+        'start_date': (normalize_date(start_date) or '') if start_date else '',
+        'end_date': (normalize_date(end_date) or '') if end_date else '',
+        'location': clean(extracted.get('aula', '')),
+        'supplier': clean(extracted.get('fornitore', '')),
+        'price': clean(extracted.get('costo', '')),
+        'description': clean(extracted.get('descrizione', '')),
+        'centro_costo': centro_costo,
+        'societa_pagante': societa_pagante,
+        'direzione_pagante': direzione_pagante,
+        'servizio_pagante': servizio_pagante,
+        'sottotipologia': sottotipologia,
+        'finanziata': finanziata_val,
+        'activities': activities,
+    }
+
+
+# ========== FORM DATES (GG/MM/AAAA) / TIMES (HH.MM) ==========
+# WHY: compiled once at import; a failed match is a cheap None instead of a
+# raised-and-caught ValueError from strptime on every bad field.
+# Used with fullmatch(), so no trailing-newline slip-through as with '$'.
+_DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+_TIME_RE = re.compile(r'(?:[01]\d|2[0-3])\.[0-5]\d')
+
+
+def _form_date(date_str: str) -> Optional[date]:
+    """Return the date for a GG/MM/AAAA string, or None if it isn't one."""
+    m = _DATE_RE.fullmatch(date_str)
+    if m is None:
+        return None
+    day, month, year = int(m[1]), int(m[2]), int(m[3])
+    # Calendar check (31/02, 00/13, ...) without raising
+    if year < 1 or not 1 <= month <= 12 or not 1 <= day <= monthrange(year, month)[1]:
+        return None
+    return date(year, month, day)
+
+
+def _parse_ddmmyyyy(date_str: str) -> date:
+    """
+    Parse a form date in the fixed GG/MM/AAAA format without strptime.
+
+    Accepts exactly what strptime("%d/%m/%Y") accepted (1-2 digit day/month,
+    4-digit year) and raises ValueError otherwise.
+    """
+    parsed = _form_date(date_str)
+    if parsed is None:
+        raise ValueError(f"not a GG/MM/AAAA date: {date_str!r}")
+    return parsed
+
+
+# ========== UTILITY 6: EDITION FORM VALIDATION ==========
+# WHY: validation is pure Python (date parsing, compares) with no st.* calls;
+# it works on a plain-dict snapshot of the form and returns the messages.
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _validate_activities(start_date_str: str, end_date_str: str,
+                         rows: Tuple[Tuple[str, ...], ...]) -> Tuple[List[Activity], List[str]]:
+    """
+    Validate the activity rows of the structured edition form.
+
+    WHY cached: the result depends only on these strings, so resubmitting
+    the same rows (e.g. after fixing an edition-level field) skips the
+    per-row parsing entirely.
+
+    Args:
+        start_date_str: Edition start, already validated as GG/MM/AAAA
+        end_date_str: Edition end, already validated as GG/MM/AAAA
+        rows: One (title, desc, date, start, end, ore) tuple per activity
+
+    Returns:
+        (activities, errors): the Activity list when errors is empty
+    """
+    from model import normalize_time
+
+    errors = []  # (row index, message) -> sorted back into row order below
+    # PASS 1: one list per field
+    titles = [r[0].strip() for r in rows]
+    descs = [r[1].strip() for r in rows]
+    date_strs = [r[2].strip() for r in rows]
+    start_strs = [r[3].strip() for r in rows]
+    end_strs = [r[4].strip() for r in rows]
+    ores = [r[5].strip() for r in rows]
+
+    # PASS 2: per-row checks; only the parsed date/times are collected here
+    parsed_rows, dates, start_times, end_times = [], [], [], []
+
+    for i, (title, act_date_str, start_time, end_time) in enumerate(
+            zip(titles, date_strs, start_strs, end_strs)):
+        activity_errors = []
+
+        # Check each field specifically
+        if not title:
+            activity_errors.append("**Titolo** è obbligatorio")
+        if not act_date_str:
+            activity_errors.append("**Data** è obbligatoria")
+
+        # Show activity-specific errors
+        if activity_errors:
+            errors.append((i, f"❌ **Attività Giorno {i + 1}**: {', '.join(activity_errors)}"))
+            continue  # Check other activities too
+
+        # Validate date format
+        act_date = _form_date(act_date_str)
+        if act_date is None:
+            errors.append((i, f"❌ **Attività Giorno {i + 1}**: Formato data non valido '{act_date_str}'. Usa GG/MM/AAAA"))
+            continue
+
+        # ── AUTO-FIX time format (Oracle requires HH.MM, e.g. 15.45) ──
+        # Already-valid HH.MM (the common case) skips normalize_time entirely
+        if not _TIME_RE.fullmatch(start_time):
+            start_time = normalize_time(start_time) if start_time else "09.00"
+        if start_time is None:
+            errors.append((i,
+                f"❌ **Attività Giorno {i + 1}**: Ora inizio non "
+                f"riconosciuta '{rows[i][3]}'. "
+                f"Usa HH.MM (es: 09.00)"))
+            continue
+
+        if not _TIME_RE.fullmatch(end_time):
+            end_time = normalize_time(end_time) if end_time else "11.00"
+        if end_time is None:
+            errors.append((i,
+                f"❌ **Attività Giorno {i + 1}**: Ora fine non "
+                f"riconosciuta '{rows[i][4]}'. "
+                f"Usa HH.MM (es: 11.00)"))
+            continue
+
+        parsed_rows.append(i)
+        dates.append(act_date)
+        start_times.append(start_time)
+        end_times.append(end_time)
+
+    # PASS 2b: edition range check on ordinals for every parsed row
+    if dates:
+        start_ord = _form_date(start_date_str).toordinal()
+        end_ord = _form_date(end_date_str).toordinal()
+        out_of_range = [i for i, d in enumerate(dates)
+                        if not start_ord <= d.toordinal() <= end_ord]
+        for j in out_of_range:
+            i = parsed_rows[j]
+            errors.append((i,
+                f"❌ **Attività Giorno {i + 1}**: La data ({date_strs[i]}) deve essere compresa tra "
+                f"l'inizio ({start_date_str}) e la fine ({end_date_str}) dell'edizione."))
+
+    if errors:
+        # At most one message per row -> a stable sort restores row order
+        errors.sort(key=lambda e: e[0])
+        return [], [msg for _, msg in errors]
+
+    # PASS 3: every row is valid -> build all Activity tuples in one go
+    return [Activity(*row) for row in
+            zip(titles, descs, dates, start_times, end_times, ores)], errors
+
+
+def _validate_edition(snap: Dict[str, Any], num_activities: int) -> Dict[str, Any]:
+    """
+    Validate the structured edition form without touching st.session_state.
+
+    Args:
+        snap: Plain dict with the edition_*_key values and the activity_*_{i} fields
+        num_activities: Number of activity rows rendered in the form
+
+    Returns:
+        Dict with 'errors' (messages to show, in order), 'show_hint' (True when
+        activity rows failed) and, if valid, 'edition_start', 'edition_end'
+        and 'activities' (list of Activity).
+    """
+    errors = []
+    result = {'errors': errors, 'show_hint': False}
+
+    # Strip ONCE up front; everything below uses the stripped values
+    course_name = snap.get('edition_course_name_key', '').strip()
+    start_date_str = snap.get('edition_start_date_str_key', '').strip()
+    end_date_str = snap.get('edition_end_date_str_key', '').strip()
+
+    # ✅ SPECIFIC ERROR MESSAGES FOR EDITION FIELDS
+    if not course_name:
+        errors.append("❌ **Nome del Corso** è obbligatorio.")
+    if not start_date_str:
+        errors.append("❌ **Data Inizio Edizione** è obbligatoria.")
+    if not end_date_str:
+        errors.append("❌ **Data Fine Edizione** è obbligatoria.")
+    if errors:
+        return result
+
+    # ✅ VALIDATE DATE FORMATS WITH SPECIFIC ERRORS
+    edition_start = _form_date(start_date_str)
+    if edition_start is None:
+        errors.append(
+            f"❌ **Data Inizio Edizione** formato non valido: '{start_date_str}'. Usa GG/MM/AAAA (es: 01/03/2026)")
+        return result
+
+    edition_end = _form_date(end_date_str)
+    if edition_end is None:
+        errors.append(f"❌ **Data Fine Edizione** formato non valido: '{end_date_str}'. Usa GG/MM/AAAA (es: 15/03/2026)")
+        return result
+
+    if edition_end < edition_start:
+        errors.append("❌ La **Data Fine Edizione** non può essere precedente alla **Data Inizio Edizione**.")
+        return result
+
+    # ✅ VALIDATE EACH ACTIVITY WITH SPECIFIC ERRORS
+    # Immutable per-row tuples in _ACTIVITY_FIELDS order -> cache key below
+    rows = tuple(tuple(snap.get(key, default)
+                       for key, default in zip(keys, _ACTIVITY_FIELD_DEFAULTS))
+                 for keys in _ACTIVITY_KEYS[:num_activities])
+    activities_list, activity_errors = _validate_activities(start_date_str, end_date_str, rows)
+
+    if activity_errors:
+        errors.extend(activity_errors)
+        result['show_hint'] = True
+        return result
+
+    result.update(edition_start=edition_start, edition_end=edition_end,
+                  activities=activities_list)
+    return result
+
+
+# Scalar edition form keys that feed EditionDetails / the validator
+_EDITION_FORM_KEYS = (
+    'edition_course_name_key', 'edition_title_key', 'edition_description_key',
+    'edition_location_key', 'edition_supplier_key', 'edition_price_key',
+    'edition_start_date_str_key', 'edition_end_date_str_key',
+    'edition_centro_costo_key', 'edition_direzione_pagante_key',
+    'edition_finanziata_key', 'edition_servizio_pagante_key',
+    'edition_sottotipologia_key', 'edition_societa_pagante_key',
+)
+
+
+def _edition_form_sig(snap: Dict[str, Any], num_activities: int) -> tuple:
+    """
+    Signature of everything the structured edition submit reads from the form.
+
+    WHY: a resubmit of an unchanged form can reuse the last validated
+    EditionDetails instead of running the whole validation pass again. The
+    raw values are kept (not hash()ed) so two different forms never collide.
+    """
+    return (tuple(snap.get(k) for k in _EDITION_FORM_KEYS),
+            tuple(snap.get(k) for keys in _ACTIVITY_KEYS[:num_activities] for k in keys))
+
+
 class CourseView:
     def __init__(self):
         self.presenter = presenter
         st.set_page_config(layout='centered')
-        # --- Basic App State ---
-        if "app_state" not in st.session_state:
-            st.session_state.app_state = "IDLE"
-
-        # === CONFIGURATION GUARD FOR CONTROLLER RUNS ===
-        if "automation_in_progress" not in st.session_state:
-            st.session_state.automation_in_progress = False
-
-        # === AUTH STATE ===
-        if "oracle_logged_in" not in st.session_state:
-            st.session_state.oracle_logged_in = False
-        if "oracle_username" not in st.session_state:
-            st.session_state.oracle_username = None
-        if "oracle_password" not in st.session_state:
-            st.session_state.oracle_password = None
-
-        # --- Message States: COURSE ---
-        if "course_message" not in st.session_state:
-            st.session_state.course_message = ""
-
-        # NEW STATE VARIABLES FOR COURSE INPUT METHOD
-        if "course_input_method" not in st.session_state:
-            st.session_state.course_input_method = "structured"  # Options: "structured", "excel", "nlp"
-        if "course_edit_mode" not in st.session_state:
-            st.session_state.course_edit_mode = False
-        if "courses_to_edit" not in st.session_state:
-            st.session_state.courses_to_edit = []
-        if "course_parsed_data" not in st.session_state:
-            st.session_state.course_parsed_data = None  # Stores parsed data from Excel/NLP
-        if "course_show_summary" not in st.session_state:
-            st.session_state.course_show_summary = False  # Controls summary display
-        if "course_nlp_input" not in st.session_state:
-            st.session_state.course_nlp_input = ""  # Stores NLP text input
-
-        # BATCH PROCESSING STATE VARIABLES ###
-        if "batch_course_data" not in st.session_state:
-            st.session_state.batch_course_data = None
-        if "batch_continue_on_error" not in st.session_state:
-            st.session_state.batch_continue_on_error = True
-        if "batch_edition_data" not in st.session_state:
-            st.session_state.batch_edition_data = None
-        if "batch_edition_results" not in st.session_state:
-            st.session_state.batch_edition_results = []
-        if "show_edition_results" not in st.session_state:
-            st.session_state.show_edition_results = False
-
-        # INITIALIZE SPACY MODEL
-        if "nlp_clear_requested" not in st.session_state:
-            st.session_state.nlp_clear_requested = False
-        if "nlp_model" not in st.session_state:
-            try:
-                st.session_state.nlp_model = spacy.load("it_core_news_sm")  # Italian model
-            except OSError:
-                st.session_state.nlp_model = None  # Will show error in UI if not loaded
-
-        # === EDITION INPUT METHOD STATES ===
-        if "edition_input_method" not in st.session_state:
-            st.session_state.edition_input_method = "structured" # "structured", "excel", "nlp"
-        if "edition_parsed_data" not in st.session_state:
-            st.session_state.edition_parsed_data = None
-        if "edition_show_summary" not in st.session_state:
-            st.session_state.edition_show_summary = False
-        if "edition_edit_mode" not in st.session_state:
-            st.session_state.edition_edit_mode = False
-        if "edition_to_edit" not in st.session_state:
-            st.session_state.edition_to_edit = None
-        if "edition_nlp_input" not in st.session_state:
-            st.session_state.edition_nlp_input = ""
-        if "edition_nlp_clear_requested" not in st.session_state:
-            st.session_state.edition_nlp_clear_requested = False
-
-        # --- Message States: EDITION and STUDENTS ---
-        if "edition_message" not in st.session_state:
-            st.session_state.edition_message = ""
-        if "student_message" not in st.session_state:
-            st.session_state.student_message = ""
-
-        if st.session_state.get("student_input_method") == "manual":
-            st.session_state.student_input_method = "txt"
-        if "student_input_method" not in st.session_state:
-            st.session_state.student_input_method = "txt"   # <-- was "manual"
-
-        # if "student_input_method" not in st.session_state:
-        #     st.session_state.student_input_method = "manual"
-        if "student_parsed_data" not in st.session_state:
-            st.session_state.student_parsed_data = None
-        if "student_show_summary" not in st.session_state:
-            st.session_state.student_show_summary = False
-        if "batch_student_data" not in st.session_state:
-            st.session_state.batch_student_data = None
-        if "verify_student_data" not in st.session_state:
-             st.session_state.verify_student_data = None
-
-        # --- Form Specific State ---
-        if "num_activities" not in st.session_state:
-            st.session_state.num_activities = 1
-        if "num_students" not in st.session_state:
-            st.session_state.num_students = 1
-
-        # --- Preserved form data storage ---
-        if "preserved_activity_data" not in st.session_state:
-            st.session_state.preserved_activity_data = {}
-        if "preserved_student_data" not in st.session_state:
-            st.session_state.preserved_student_data = {}
-
-        #presenza
-        if "presenza_data" not in st.session_state:
-            st.session_state.presenza_data = None
-        if "presenza_show_summary" not in st.session_state:
-            st.session_state.presenza_show_summary = False
-        if "presenza_message" not in st.session_state:
-            st.session_state.presenza_message = ""
-        # Multi-edition presenza batch state
-        if "presenza_batch_data" not in st.session_state:
-            st.session_state.presenza_batch_data = None
-        if "presenza_show_batch_preview" not in st.session_state:
-            st.session_state.presenza_show_batch_preview = False
-
-        # --- Initialize Widget States ---
-        if "course_date_str_key" not in st.session_state:
-            st.session_state.course_date_str_key = "01/01/2023"
-
-        # Initialize activity fields
-        for i in range(30):
-            if f"activity_title_{i}" not in st.session_state:
-                st.session_state[f"activity_title_{i}"] = ""
-            if f"activity_desc_{i}" not in st.session_state:
-                st.session_state[f"activity_desc_{i}"] = ""
-            if f"activity_date_{i}" not in st.session_state:
-                st.session_state[f"activity_date_{i}"] = ""
-            if f"activity_start_time_{i}" not in st.session_state:
-                st.session_state[f"activity_start_time_{i}"] = "09.00"
-            if f"activity_end_time_{i}" not in st.session_state:
-                st.session_state[f"activity_end_time_{i}"] = "11.00"
-            if f"impegno_previsto_in_ore_{i}" not in st.session_state:
-                st.session_state[f"impegno_previsto_in_ore_{i}"] = ""
-
-        # Initialize student fields
-        for i in range(50):
-            if f"student_name_{i}" not in st.session_state:
-                st.session_state[f"student_name_{i}"] = ""
-
-        st.image("logo-agsm.jpg", width=200)
+        # Bound once: every st.session_state access goes through the proxy
+        state = st.session_state
+        # --- Session defaults: one pass over a table built at import ---
+        if state.get("student_input_method") == "manual":
+            state.student_input_method = "txt"   # <-- was "manual"
+        # Collect the missing keys first and hand them over in one update;
+        # logout deletes the auth keys, so this still runs every rerun.
+        # Fresh list/dict per session: the table's objects are shared
+        missing = {
+            key: value.copy() if isinstance(value, (list, dict)) else value
+            for key, value in _SESSION_DEFAULTS.items()
+            if key not in state
+        }
+        if missing:
+            state.update(missing)
+
+        # Initialize activity + student fields ONCE per session
+        # WHY: __init__ runs on every rerun; re-checking 230 keys each time
+        # is wasted work. The structured form re-seeds the time defaults of
+        # the rows it renders, in case Streamlit dropped an unrendered widget key.
+        if not state.get("_view_initialized"):
+            missing = {key: value for key, value in _WIDGET_DEFAULTS.items()
+                       if key not in state}
+            missing["_view_initialized"] = True
+            state.update(missing)
+
+        st.image(_load_logo(), width=200)
         st.title("Automatore per la Gestione dei Corsi Oracle")
 
         #  Initialize placeholders as None
@@ -407,18 +1584,19 @@ class CourseView:
         self.edition_output_placeholder = None
         self.student_output_placeholder = None
 
-        # Load saved theme preferences if they exist
+        # Load saved theme preferences if they exist - only until both are
+        # in the session, not on every rerun
         import json, os
         prefs_path = os.path.join(os.path.dirname(__file__), 'user_preferences.json')
-        if os.path.exists(prefs_path):
+        if ('user_theme' not in state or 'user_font' not in state) and os.path.exists(prefs_path):
             try:
                 with open(prefs_path, 'r', encoding='utf-8') as f:
                     prefs = json.load(f)
-                if 'user_theme' not in st.session_state:
-                    st.session_state.user_theme = prefs.get(
+                if 'user_theme' not in state:
+                    state.user_theme = prefs.get(
                         'user_theme', 'Scuro (default)')
-                if 'user_font' not in st.session_state:
-                    st.session_state.user_font = prefs.get(
+                if 'user_font' not in state:
+                    state.user_font = prefs.get(
                         'user_font', 'Sans-serif (default)')
             except:
                 pass
@@ -594,7 +1772,7 @@ class CourseView:
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             try:
-                st.image("logo-agsm.jpg", width=200)
+                st.image(_load_logo(), width=200)
             except:
                 pass
             st.title("🔐 Oracle Course Automator")
@@ -721,17 +1899,23 @@ class CourseView:
 
     def _clear_nlp_input_callback(self):
         """Safely clear NLP input and ALL related states."""
+        ss = st.session_state
+        # Clear tracking variables. Callbacks run BEFORE the script, so the
+        # text_area is already rendered empty - no extra st.rerun() needed.
+        reset = {"course_nlp_input": "", "course_parsed_data": None,
+                 "course_show_summary": False}
         # If using key in text_area, clear that key
-        if "course_nlp_text_key" in st.session_state:
-            st.session_state.course_nlp_text_key = ""
-
-        # Clear tracking variables
-        st.session_state.nlp_clear_requested = True
-        st.session_state.course_nlp_input = ""
-        st.session_state.course_parsed_data = None
-        st.session_state.course_show_summary = False
+        if "course_nlp_text_key" in ss:
+            reset["course_nlp_text_key"] = ""
+        ss.update(reset)
         print("NLP cleared - all states reset")
 
+    def _clear_course_excel_callback(self):
+        """Drop the uploaded course Excel: a new uploader key renders it empty."""
+        ss = st.session_state
+        ss.update(course_excel_uploader_gen=ss.course_excel_uploader_gen + 1,
+                  course_parsed_data=None, course_show_summary=False)
+
     def get_user_options(self):
         st.sidebar.header("Impostazioni")
         headless = st.sidebar.toggle("Esegui in background", value=True)
@@ -917,10 +2101,9 @@ class CourseView:
                         st.rerun()
 
     def _clear_course_form_callback(self):
-        st.session_state.course_title_key = ""
-        st.session_state.course_programme_key = ""
-        st.session_state.course_short_desc_key = ""
-        st.session_state.course_date_str_key = "01/01/2023"
+        st.session_state.update(course_title_key="", course_programme_key="",
+                                course_short_desc_key="",
+                                course_date_str_key="01/01/2023")
 
     # NEW HELPER METHOD - PARSE EXCEL FILE
     def _parse_excel_file(self, uploaded_file) -> Optional[Dict[str, Any]]:
@@ -939,42 +2122,14 @@ class CourseView:
         standard spreadsheet practices.
         """
         try:
-            # READ EXCEL WITH HEADER ROW
-            # Read with first row as header
-            df = pd.read_excel(uploaded_file, header=0, engine='openpyxl')
-
-            # NORMALIZE COLUMN NAMES
-            # Remove extra spaces, convert to lowercase for matching
-            df.columns = df.columns.str.strip().str.lower()
+            result = _parse_course_excel_bytes(uploaded_file.getvalue())
 
             # SHOW WHAT COLUMNS WERE FOUND
-            st.info(f"📊 Colonne trovate nel file: {', '.join(df.columns)}")
-
-            # DEFINE EXPECTED COLUMN MAPPINGS
-            # Support multiple possible column names for flexibility
-            column_mappings = {
-                'title': ['nome corso', 'titolo', 'corso', 'nome', 'title'],
-                'description': ['descrizione', 'desc', 'breve descrizione', 'description'],
-                'date': ['data inizio pubblicazione', 'data pubblicazione', 'data inizio',
-                         'data', 'pubblicazione', 'date', 'start date']
-            }
-
-            # FIND ACTUAL COLUMN NAMES IN FILE
-            found_columns = {}
-            for field, possible_names in column_mappings.items():
-                for possible_name in possible_names:
-                    if possible_name in df.columns:
-                        found_columns[field] = possible_name
-                        break
+            st.info(f"📊 Colonne trovate nel file: {', '.join(result['columns'])}")
 
             # VALIDATE REQUIRED COLUMNS EXIST
-            missing_columns = []
-            for field in ['title', 'description', 'date']:
-                if field not in found_columns:
-                    missing_columns.append(field)
-
-            if missing_columns:
-                st.error(f"❌ Colonne mancanti nel file Excel: {', '.join(missing_columns)}")
+            if result['missing_columns']:
+                st.error(f"❌ Colonne mancanti nel file Excel: {', '.join(result['missing_columns'])}")
                 st.info("""
                 **Formato richiesto:**
                 - Colonna 1: NOME CORSO (o TITOLO, CORSO)
@@ -983,54 +2138,15 @@ class CourseView:
                 """)
                 return None
 
-            # EXTRACT ALL COURSES FROM ROWS
-            courses_list = []
-            skipped_rows = []
-
-            for index, row in df.iterrows():
-                # Get values from mapped columns
-                title_val = row[found_columns['title']]
-                desc_val = row[found_columns['description']]
-                date_val = row[found_columns['date']]
-
-                #SKIP EMPTY ROWS
-                if pd.isna(title_val) and pd.isna(desc_val) and pd.isna(date_val):
-                    continue  # Skip completely empty rows
-
-                # VALIDATE ROW DATA
-                if pd.isna(title_val) or not str(title_val).strip():
-                    skipped_rows.append(f"Riga {index + 2}: Titolo mancante")
-                    continue
-
-                if pd.isna(desc_val) or not str(desc_val).strip():
-                    skipped_rows.append(f"Riga {index + 2}: Descrizione mancante")
-                    continue
-
-                if pd.isna(date_val):
-                    skipped_rows.append(f"Riga {index + 2}: Data mancante")
-                    continue
-
-                # NORMALIZE DATE USING CENTRALIZED FUNCTION
-                normalized_date = normalize_date(date_val)
-
-                if not normalized_date:
-                    skipped_rows.append(f"Riga {index + 2}: Formato data non valido ({date_val})")
-                    continue
-
-                # ADD VALID COURSE TO LIST
-                courses_list.append({
-                    'title': str(title_val).strip(),
-                    'short_description': str(desc_val).strip(),
-                    'start_date': normalized_date,
-                    'programme': "",  # Optional field, empty for now
-                    'row_number': index + 2  # Excel row number for reference
-                })
+            courses_list = result['courses']
+            skipped_rows = result['skipped_rows']
 
             # SHOW SUMMARY OF PARSING RESULTS
+            # ONE warning element for all skipped rows (not one st.write per row)
             if skipped_rows:
-                st.warning(f"⚠️ {len(skipped_rows)} righe saltate:")
-                for skip_msg in skipped_rows:
-                    st.write(f"- {skip_msg}")
+                st.warning(f"⚠️ {len(skipped_rows)} righe saltate:\n" + "\n".join(
+                    f"- Riga {row_number}: {_SKIP_REASON_TEXT[code].format(value)}"
+                    for row_number, code, value in skipped_rows))
 
             if not courses_list:
                 st.error("❌ Nessun corso valido trovato nel file Excel.")
@@ -1039,6 +2155,7 @@ class CourseView:
             st.success(f"✅ {len(courses_list)} corsi estratti con successo!")
 
             # RETURN DATA STRUCTURE FOR BATCH PROCESSING
+            # (cache_data hands out a fresh copy, so callers may mutate it)
             return {
                 'courses': courses_list,
                 'total_count': len(courses_list),
@@ -1048,7 +2165,6 @@ class CourseView:
 
         except Exception as e:
             st.error(f"❌ Errore durante la lettura del file Excel: {str(e)}")
-            import traceback
             with st.expander("🔍 Dettagli errore"):
                 st.code(traceback.format_exc())
             return None
@@ -1057,6 +2173,7 @@ class CourseView:
         """
         Display preview table of all courses from Excel with selection options.
         """
+        import pandas as pd
         if not batch_data or 'courses' not in batch_data:
             return
 
@@ -1068,22 +2185,17 @@ class CourseView:
         st.subheader("📋 Anteprima Corsi da Creare")
 
         # ### CREATE PREVIEW DATAFRAME ###
-        preview_data = []
-        for idx, course in enumerate(batch_data['courses']):
-            # Format date for display
-            date_display = course['start_date']
-            if isinstance(date_display, (datetime, date)):
-                date_display = date_display.strftime("%d/%m/%Y")
-
-            preview_data.append({
-                '#': idx + 1,
-                'Titolo': course['title'],
-                'Descrizione': course['short_description'],
-                'Data Pubblicazione': date_display,
-                'Riga Excel': course.get('row_number', '-')
-            })
-
-        preview_df = pd.DataFrame(preview_data)
+        # One constructor call over the course dicts (columns picked by key)
+        # instead of building a second list of per-row dicts
+        preview_df = pd.DataFrame(
+            batch_data['courses'],
+            columns=['title', 'short_description', 'start_date', 'row_number'],
+        ).rename(columns=_COURSE_PREVIEW_COLUMNS)
+        preview_df.insert(0, '#', range(1, len(preview_df) + 1))
+        # Format date objects (edited rows) for display; strings pass through
+        preview_df['Data Pubblicazione'] = preview_df['Data Pubblicazione'].map(
+            lambda d: d.strftime("%d/%m/%Y") if isinstance(d, date) else d)
+        preview_df['Riga Excel'] = preview_df['Riga Excel'].fillna('-')
 
         st.dataframe(
             preview_df,
@@ -1122,16 +2234,20 @@ class CourseView:
                     key="batch_confirm_btn"
             ):
                 # Convert string dates to date objects
-                for course in batch_data['courses']:
-                    date_str = course['start_date']
-                    if isinstance(date_str, str):
-                        try:
-                            course['start_date'] = datetime.strptime(date_str, "%d/%m/%Y").date()
-                        except ValueError:
-                            st.error(f"❌ Formato data non valido per '{course['title']}': {date_str}")
-                            st.stop()
-                    elif isinstance(date_str, date):
-                        course['start_date'] = date_str
+                # ONE vectorized parse for the whole batch (cache=True dedups
+                # repeated dates); date objects are already in shape
+                courses = batch_data['courses']
+                str_idx = [i for i, c in enumerate(courses) if isinstance(c['start_date'], str)]
+                parsed = pd.to_datetime(
+                    pd.Series([courses[i]['start_date'] for i in str_idx], dtype=object),
+                    format="%d/%m/%Y", errors="coerce", cache=True)
+                bad = parsed.isna().to_numpy()
+                if bad.any():
+                    course = courses[str_idx[bad.argmax()]]  # first invalid, as before
+                    st.error(f"❌ Formato data non valido per '{course['title']}': {course['start_date']}")
+                    st.stop()
+                for i, start in zip(str_idx, parsed.dt.date):
+                    courses[i]['start_date'] = start
 
                 st.session_state.batch_course_data = batch_data
                 st.session_state.batch_continue_on_error = continue_on_error
@@ -1276,13 +2392,22 @@ class CourseView:
         # Handle form actions
         if submit:
             # Validate and collect all courses
+            import pandas as pd
             valid_courses = []
             has_errors = False
 
-            for idx in range(len(courses)):
+            # PARSE ALL START DATES IN ONE VECTORIZED CALL
+            # WHY: one C-level parse (cache=True dedups repeated dates) instead
+            # of a strptime + try/except per course; NaT marks a bad format
+            date_strs = [st.session_state.get(f"edit_date_{idx}", '').strip()
+                         for idx in range(len(courses))]
+            parsed_dates = pd.to_datetime(pd.Series(date_strs, dtype=object),
+                                          format="%d/%m/%Y", errors="coerce", cache=True)
+
+            for idx, parsed_date in enumerate(parsed_dates):
                 title = st.session_state.get(f"edit_title_{idx}", '').strip()
                 desc = st.session_state.get(f"edit_desc_{idx}", '').strip()
-                date_str = st.session_state.get(f"edit_date_{idx}", '').strip()
+                date_str = date_strs[idx]
                 prog = st.session_state.get(f"edit_prog_{idx}", '').strip()
 
                 # Validate required fields
@@ -1302,9 +2427,7 @@ class CourseView:
                     continue
 
                 # Validate date format
-                try:
-                    date_obj = datetime.strptime(date_str, "%d/%m/%Y").date()
-                except ValueError:
+                if pd.isna(parsed_date):
                     st.error(f"❌ Corso {idx + 1}: Formato data non valido. Usa GG/MM/AAAA.")
                     has_errors = True
                     continue
@@ -1312,7 +2435,7 @@ class CourseView:
                 valid_courses.append({
                     'title': title,
                     'short_description': desc,
-                    'start_date': date_obj,
+                    'start_date': parsed_date.date(),
                     'programme': prog,
                     'row_number': idx + 1
                 })
@@ -1372,125 +2495,6 @@ class CourseView:
             st.session_state.course_input_method = "structured"
             st.rerun()
 
-    def _parse_excel_batch(self, uploaded_file) -> Optional[Dict[str, Any]]:
-            """
-            Parse uploaded Excel file with MULTIPLE courses (vertical/table format).
-
-            NEW FORMAT (Vertical/Table):
-            Row 1: NOME CORSO | DESCRIZIONE | DATA INIZIO PUBBLICAZIONE
-            Row 2: Analitica  | Informatica | 1.1.2023
-            Row 3: Musica     | Art         | 1.1.2023
-
-            Returns: Dictionary with 'courses' list and metadata
-            """
-            try:
-                # Read Excel with first row as header
-                df = pd.read_excel(uploaded_file, header=0, engine='openpyxl')
-
-                # Normalize column names
-                df.columns = df.columns.str.strip().str.lower()
-
-                st.info(f"📊 Colonne trovate: {', '.join(df.columns)}")
-
-                # Define expected column mappings
-                column_mappings = {
-                    'title': ['nome corso', 'titolo', 'corso', 'nome'],
-                    'description': ['descrizione', 'desc', 'breve descrizione'],
-                    'date': ['data inizio pubblicazione', 'data pubblicazione', 'data inizio', 'data']
-                }
-
-                # Find actual column names in file
-                found_columns = {}
-                for field, possible_names in column_mappings.items():
-                    for possible_name in possible_names:
-                        if possible_name in df.columns:
-                            found_columns[field] = possible_name
-                            break
-
-                # Validate required columns exist
-                missing_columns = []
-                for field in ['title', 'description', 'date']:
-                    if field not in found_columns:
-                        missing_columns.append(field)
-
-                if missing_columns:
-                    st.error(f"❌ Colonne mancanti: {', '.join(missing_columns)}")
-                    st.info("""
-                    **Formato richiesto:**
-                    - Colonna 1: NOME CORSO (o TITOLO)
-                    - Colonna 2: DESCRIZIONE
-                    - Colonna 3: DATA INIZIO PUBBLICAZIONE (o DATA)
-                    """)
-                    return None
-
-                # Extract all courses from rows
-                courses_list = []
-                skipped_rows = []
-
-                for index, row in df.iterrows():
-                    title_val = row[found_columns['title']]
-                    desc_val = row[found_columns['description']]
-                    date_val = row[found_columns['date']]
-
-                    # Skip empty rows
-                    if pd.isna(title_val) and pd.isna(desc_val) and pd.isna(date_val):
-                        continue
-
-                    # Validate row data
-                    if pd.isna(title_val) or not str(title_val).strip():
-                        skipped_rows.append(f"Riga {index + 2}: Titolo mancante")
-                        continue
-
-                    if pd.isna(desc_val) or not str(desc_val).strip():
-                        skipped_rows.append(f"Riga {index + 2}: Descrizione mancante")
-                        continue
-
-                    if pd.isna(date_val):
-                        skipped_rows.append(f"Riga {index + 2}: Data mancante")
-                        continue
-
-                    # Normalize date
-                    normalized_date = normalize_date(date_val)
-
-                    if not normalized_date:
-                        skipped_rows.append(f"Riga {index + 2}: Formato data non valido ({date_val})")
-                        continue
-
-                    # Add valid course to list
-                    courses_list.append({
-                        'title': str(title_val).strip(),
-                        'short_description': str(desc_val).strip(),
-                        'start_date': normalized_date,
-                        'programme': "",
-                        'row_number': index + 2
-                    })
-
-                # Show summary
-                if skipped_rows:
-                    st.warning(f"⚠️ {len(skipped_rows)} righe saltate:")
-                    for skip_msg in skipped_rows:
-                        st.write(f"- {skip_msg}")
-
-                if not courses_list:
-                    st.error("❌ Nessun corso valido trovato.")
-                    return None
-
-                st.success(f"✅ {len(courses_list)} corsi estratti!")
-
-                return {
-                    'courses': courses_list,
-                    'total_count': len(courses_list),
-                    'skipped_count': len(skipped_rows),
-                    'file_name': uploaded_file.name
-                }
-
-            except Exception as e:
-                st.error(f"❌ Errore lettura Excel: {str(e)}")
-                import traceback
-                with st.expander("🔍 Dettagli errore"):
-                    st.code(traceback.format_exc())
-                return None
-
     def _parse_nlp_input(self, text: str) -> Optional[Dict[str, Any]]:
         """
         Parse natural language input by finding keyword positions
@@ -1507,112 +2511,7 @@ class CourseView:
             return None
 
         try:
-            import re
-
-            parsed_data = {
-                'title': "",
-                'short_description': "",
-                'start_date': "",
-                'programme': ""
-            }
-
-            original_text = text
-            text_lower = text.lower()
-
-            # ═══════════════════════════════════════════════════
-            # STEP 1: Find positions of each keyword
-            # ═══════════════════════════════════════════════════
-            keywords = {
-                'titolo': r'\btitolo\b',
-                'descrizione': r'\bdescrizione(?:\s+breve)?\b',
-                'data': (r'\bdata(?:\s+(?:di\s+)?(?:inizio|pubblicazione))?\b'
-                         r'|\bpubblicazione\b'),
-                'programma': r'\bprogramma\b',
-            }
-
-            positions = {}
-            for key, pattern in keywords.items():
-                match = re.search(pattern, text_lower)
-                if match:
-                    positions[key] = {
-                        'start': match.start(),
-                        'end': match.end()
-                    }
-
-            # ═══════════════════════════════════════════════════
-            # STEP 2: Sort keywords by position and extract values between them
-            # ═══════════════════════════════════════════════════
-            sorted_keys = sorted(positions.keys(),
-                                 key=lambda k: positions[k]['start'])
-
-            for i, key in enumerate(sorted_keys):
-                value_start = positions[key]['end']
-                if i + 1 < len(sorted_keys):
-                    value_end = positions[sorted_keys[i + 1]]['start']
-                else:
-                    value_end = len(original_text)
-
-                value = original_text[value_start:value_end].strip()
-                # Strip trailing connectors and punctuation
-                value = re.sub(r'\s+(con|e|ed)\s*$', '', value,
-                               flags=re.IGNORECASE).strip()
-                value = value.strip(' ,;:-')
-
-                if key == 'titolo':
-                    parsed_data['title'] = value
-                elif key == 'descrizione':
-                    parsed_data['short_description'] = value
-                elif key == 'data':
-                    # Find numeric date inside the slice
-                    date_match = re.search(
-                        r'(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4})', value)
-                    if date_match:
-                        parsed_data['start_date'] = (
-                                normalize_date(date_match.group(1)) or '')
-                    else:
-                        # Try Italian month name (e.g., "12 marzo 2024")
-                        italian = parse_italian_date(value)
-                        if italian:
-                            parsed_data['start_date'] = italian
-                elif key == 'programma':
-                    parsed_data['programme'] = value
-
-            # ═══════════════════════════════════════════════════
-            # STEP 3: FALLBACK — "corso X" pattern if 'titolo' keyword not used
-            # Example: "Crea un corso Excel Base data 01/01/2024"
-            # ═══════════════════════════════════════════════════
-            if not parsed_data['title']:
-                corso_match = re.search(
-                    r'\bcorso\s+(.+?)'
-                    r'(?=\s+descrizione|\s+data\s|\s+pubblicazione'
-                    r'|\s+programma|\s+con\s+descrizione|$)',
-                    text_lower, re.IGNORECASE)
-                if corso_match:
-                    value = original_text[
-                            corso_match.start(1):corso_match.end(1)].strip()
-                    value = re.sub(r'\s+(con|e|ed)\s*$', '', value,
-                                   flags=re.IGNORECASE).strip()
-                    value = value.strip(' ,;:-')
-                    if value:
-                        parsed_data['title'] = value
-
-            # ═══════════════════════════════════════════════════
-            # STEP 4: FALLBACK — find date anywhere in text
-            # if 'data' keyword wasn't found at all
-            # ═══════════════════════════════════════════════════
-            if not parsed_data['start_date']:
-                # Try Italian month names anywhere in text
-                italian = parse_italian_date(text_lower)
-                if italian:
-                    parsed_data['start_date'] = italian
-                else:
-                    # Try numeric date anywhere
-                    date_match = re.search(
-                        r'\b(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{2,4})\b',
-                        original_text)
-                    if date_match:
-                        parsed_data['start_date'] = (
-                                normalize_date(date_match.group(1)) or '')
+            parsed_data = _parse_course_nlp_text(text)
 
             # ═══════════════════════════════════════════════════
             # STEP 5: Validate and report with detailed UI feedback
@@ -1638,21 +2537,16 @@ class CourseView:
                     st.success(f"✅ Estratti {extracted_count}/3 campi con successo!")
                     st.info("**Dati estratti finora:**")
 
-                    if parsed_data['title'].strip():
-                        st.write(f"- ✅ **Titolo:** `{parsed_data['title']}`")
-                    else:
-                        st.write(f"- ❌ **Titolo:** non trovato")
-
-                    if parsed_data['short_description'].strip():
-                        st.write(
-                            f"- ✅ **Descrizione:** `{parsed_data['short_description']}`")
-                    else:
-                        st.write(f"- ❌ **Descrizione:** non trovata")
-
-                    if parsed_data['start_date'].strip():
-                        st.write(f"- ✅ **Data:** `{parsed_data['start_date']}`")
-                    else:
-                        st.write(f"- ❌ **Data:** non trovata")
+                    # ONE markdown element for the field list (not one st.write per line)
+                    st.markdown("\n".join((
+                        f"- ✅ **Titolo:** `{parsed_data['title']}`"
+                        if parsed_data['title'].strip() else "- ❌ **Titolo:** non trovato",
+                        f"- ✅ **Descrizione:** `{parsed_data['short_description']}`"
+                        if parsed_data['short_description'].strip()
+                        else "- ❌ **Descrizione:** non trovata",
+                        f"- ✅ **Data:** `{parsed_data['start_date']}`"
+                        if parsed_data['start_date'].strip() else "- ❌ **Data:** non trovata",
+                    )))
 
                     st.info(
                         "💡 **Suggerimento:** Puoi comunque procedere. "
@@ -1667,75 +2561,53 @@ class CourseView:
 
         except Exception as e:
             st.error(f"Errore durante l'analisi NLP: {str(e)}")
-            import traceback
             st.code(traceback.format_exc())
             return None
 
     def _clear_edition_activity_form_callback(self):
         """Clear all edition and activity form fields"""
-        # Clear edition fields
-        st.session_state.edition_course_name_key = ""
-        st.session_state.edition_title_key = ""
-        st.session_state.edition_start_date_str_key = ""
-        st.session_state.edition_end_date_str_key = ""
-        st.session_state.edition_description_key = ""
-        st.session_state.edition_location_key = ""
-        st.session_state.edition_supplier_key = ""
-        st.session_state.edition_price_key = ""
-
-        # Clear the "Attributi Aggiuntivi" fields too (these were missed before,
-        # which is why some fields stayed filled after Pulisci).
-        st.session_state.edition_centro_costo_key = ""
-        st.session_state.edition_societa_pagante_key = ""
-        st.session_state.edition_direzione_pagante_key = ""
-        st.session_state.edition_servizio_pagante_key = ""
-        st.session_state.edition_sottotipologia_key = ""
-        st.session_state.edition_finanziata_key = ""
-
-        st.session_state.num_activities = 1
-
-        # ✅ Clear preserved data to prevent restoration of old values
-        st.session_state.preserved_activity_data = {}
-
-        # Clear ALL activity fields
-        for i in range(30):
-            if f"activity_title_{i}" in st.session_state:
-                st.session_state[f"activity_title_{i}"] = ""
-            if f"activity_desc_{i}" in st.session_state:
-                st.session_state[f"activity_desc_{i}"] = ""
-            if f"activity_date_{i}" in st.session_state:
-                st.session_state[f"activity_date_{i}"] = ""
-            if f"activity_start_time_{i}" in st.session_state:
-                st.session_state[f"activity_start_time_{i}"] = "09.00"
-            if f"activity_end_time_{i}" in st.session_state:
-                st.session_state[f"activity_end_time_{i}"] = "11.00"
-            if f"impegno_previsto_in_ore_{i}" in st.session_state:
-                st.session_state[f"impegno_previsto_in_ore_{i}"] = ""
+        ss = st.session_state
+        # ONE batched update() for the whole form:
+        # - edition fields, including the "Attributi Aggiuntivi" ones (these
+        #   were missed before, which is why some fields stayed filled after
+        #   Pulisci) - _EDITION_FORM_KEYS lists all 14
+        # - ✅ preserved data cleared to prevent restoration of old values
+        # - every existing activity widget key back to its default
+        reset = dict.fromkeys(_EDITION_FORM_KEYS, "")
+        reset.update(num_activities=1, preserved_activity_data={})
+        reset.update({key: default
+                      for keys in _ACTIVITY_KEYS
+                      for key, default in zip(keys, _ACTIVITY_FIELD_DEFAULTS)
+                      if key in ss})
+        ss.update(reset)
 
         print("Edition+Activity form cleared")
 
     def _clear_edition_nlp_callback(self):
         """Clear NLP input for edition - must clear the KEY-based state"""
-        # Clear the widget's key-based state (this is what Streamlit uses internally)
-        st.session_state.edition_nlp_text_area = ""  # ✅ Clear the KEY!
-
-        # Also clear our tracking variables
-        st.session_state.edition_nlp_input = ""
-        st.session_state.edition_parsed_data = None
-        st.session_state.edition_show_summary = False
+        st.session_state.update(
+            # Clear the widget's key-based state (this is what Streamlit uses internally)
+            edition_nlp_text_area="",  # ✅ Clear the KEY!
+            # Also clear our tracking variables
+            edition_nlp_input="",
+            edition_parsed_data=None,
+            edition_show_summary=False,
+        )
         print("DEBUG: Edition NLP cleared")
 
     def _clear_student_form_callback(self):
-        st.session_state.student_edition_code_key = ""
-        st.session_state.num_students = 1
-        st.session_state.student_input_method = "txt"  # <-- was "manual"
-        st.session_state.student_parsed_data = None
-        st.session_state.student_show_summary = False
-
-        st.session_state.preserved_student_data = {}
-        for i in range(50):
-            if f"student_name_{i}" in st.session_state:
-                st.session_state[f"student_name_{i}"] = ""
+        ss = st.session_state
+        # One batched update(): form state + every existing student name key
+        reset = {key: "" for key in _STUDENT_NAME_KEYS if key in ss}
+        reset.update(
+            student_edition_code_key="",
+            num_students=1,
+            student_input_method="txt",  # <-- was "manual"
+            student_parsed_data=None,
+            student_show_summary=False,
+            preserved_student_data={},
+        )
+        ss.update(reset)
 
     # NEW HELPER METHOD - DISPLAY SUMMARY WITH EDIT/CONFIRM
     #---COURSE---
@@ -1794,7 +2666,7 @@ class CourseView:
         # HANDLE FORM ACTIONS
         if confirm:
             # Validate and submit
-            if not all([title.strip(), short_desc.strip(), date_str.strip()]):
+            if not (title.strip() and short_desc.strip() and date_str.strip()):
                 st.error("I campi 'Titolo', 'Breve Descrizione' e 'Data' sono obbligatori.")
                 st.stop()
 
@@ -1854,12 +2726,8 @@ class CourseView:
 
         input_method = st.radio(
             "Come vuoi inserire i dati del corso?",
-            options=["structured", "excel", "nlp"],
-            format_func=lambda x: {
-                "structured": "📝 Input Strutturato (Form)",
-                "excel": "📊 Caricamento File Excel",
-                "nlp": "💬 Compilazione con AI"
-            }[x],
+            options=list(_INPUT_LABELS),
+            format_func=_INPUT_LABELS.__getitem__,
             key="course_input_method",
             horizontal=True
         )
@@ -1950,7 +2818,8 @@ class CourseView:
             uploaded_file = st.file_uploader(
                 "Carica File Excel (.xlsx, .xls)",
                 type=['xlsx', 'xls'],
-                help="File con uno o più corsi in formato tabella"
+                help="File con uno o più corsi in formato tabella",
+                key=f"course_excel_uploader_{st.session_state.course_excel_uploader_gen}"
             )
 
             if uploaded_file is not None:
@@ -1970,8 +2839,8 @@ class CourseView:
                             st.error("❌ Impossibile estrarre i dati dal file. Verifica il formato.")
 
                 with col2:
-                    if st.button("🧹 Cancella File", width='stretch'):
-                        st.rerun()
+                    st.button("🧹 Cancella File", width='stretch',
+                              on_click=self._clear_course_excel_callback)
 
         # ========== METHOD 3: NATURAL LANGUAGE PROCESSING ==========
         elif input_method == "nlp":
@@ -1991,22 +2860,6 @@ class CourseView:
             Il sistema estrarrà automaticamente le informazioni rilevanti.
             """, icon="💡")
 
-            #Handle clear request
-            if st.session_state.get('nlp_clear_requested', False):
-                # Reset the input to empty string
-                st.session_state.course_nlp_input = ""
-                st.session_state.nlp_clear_requested = False
-
-                # DOUBLE-CHECK OTHER STATES ARE CLEARED ###
-                # (Callback should have done this, but ensure it)
-                if st.session_state.course_parsed_data is not None:
-                    st.session_state.course_parsed_data = None
-                if st.session_state.course_show_summary:
-                    st.session_state.course_show_summary = False
-
-                #FORCE CLEAN RERUN ###
-                st.rerun()
-
             nlp_text = st.text_area(
                 "Descrivi il corso in linguaggio naturale:",
                 height=150, value=st.session_state.course_nlp_input,#use value instead of key for manual holder
@@ -2081,8 +2934,9 @@ class CourseView:
         Format 2: Single sheet with TIPO column (EDIZIONE/ATTIVITA markers)
         Format 3: Single sheet with edition headers followed by activity rows
         """
+        import pandas as pd
         try:
-            excel_file = pd.ExcelFile(uploaded_file, engine='openpyxl')
+            excel_file = _open_excel_file(uploaded_file)
             sheet_names = excel_file.sheet_names
             sheet_names_lower = [s.lower() for s in sheet_names]
 
@@ -2099,6 +2953,8 @@ class CourseView:
                 return self._parse_two_sheet_edition_excel(excel_file)
 
             # Single sheet - check for TIPO column or detect pattern
+            # Read ONCE without a header: the format parsers below reuse this
+            # frame instead of parsing the sheet XML a second time
             df = pd.read_excel(excel_file, sheet_name=0, header=None)
 
             # Check first column for "TIPO" or "EDIZIONE"/"ATTIVITA" markers
@@ -2106,12 +2962,12 @@ class CourseView:
 
             if 'tipo' in first_col_values or any('edizione' in v for v in first_col_values):
                 st.success("✅ Rilevato formato: Foglio singolo con marcatori TIPO")
-                return self._parse_single_sheet_with_markers(excel_file)
+                return self._parse_single_sheet_with_markers(df)
 
             # Check for your original format (header pattern detection)
             if self._detect_original_format(df):
                 st.success("✅ Rilevato formato: Foglio singolo con intestazioni ripetute")
-                return self._parse_original_format(excel_file)
+                return self._parse_original_format(df)
 
             st.error("❌ Formato Excel non riconosciuto")
             return None
@@ -2120,50 +2976,59 @@ class CourseView:
             st.error(f"❌ Errore: {str(e)}")
             return None
 
-    def _parse_single_sheet_with_markers(self, excel_file) -> Optional[Dict[str, Any]]:
+    def _parse_single_sheet_with_markers(self, raw_df) -> Optional[Dict[str, Any]]:
         """Parse single sheet with TIPO column (EDIZIONE/ATTIVITA markers)"""
-        df = pd.read_excel(excel_file, sheet_name=0)
-        df.columns = df.columns.str.strip().str.lower()
-
-        editions_list = []
-        current_edition = None
-
-        for idx, row in df.iterrows():
-            row_type = str(row.get('tipo', '')).strip().lower()
-
-            if 'edizione' in row_type:
-                # Save previous edition if exists
-                if current_edition:
-                    editions_list.append(current_edition)
-
-                # Start new edition
-                current_edition = {
-                    'course_name': str(row.get('nome_corso', '')).strip(),
-                    'edition_title': str(row.get('titolo', '')).strip(),
-                    'start_date': normalize_date(row.get('data_inizio', '')),
-                    'end_date': normalize_date(row.get('data_fine', '')),
-                    'location': str(row.get('aula', '')).strip(),
-                    'supplier': str(row.get('fornitore', '')).strip(),
-                    'price': str(row.get('costo', '')).strip(),
-                    'description': '',
-                    'activities': []
-                }
-
-            elif 'attivita' in row_type and current_edition:
-                # Add activity to current edition
-                activity = {
-                    'title': str(row.get('titolo', '')).strip(),
-                    'description': str(row.get('descrizione', '')).strip(),
-                    'date': normalize_date(row.get('data', '')),
-                    'start_time': str(row.get('ora_inizio', '09.00')).replace(':', '.'),
-                    'end_time': str(row.get('ora_fine', '11.00')).replace(':', '.'),
-                    'impegno_ore': str(row.get('impegno', '')).strip()
-                }
-                current_edition['activities'].append(activity)
+        # Promote the first row to the header in memory (what header=0 did);
+        # infer_objects restores per-column dtypes as read_excel would
+        df = raw_df.iloc[1:].reset_index(drop=True).infer_objects()
+        df.columns = _normalized_columns(raw_df.iloc[0])
+
+        # ROW KINDS FOR THE WHOLE SHEET AT ONCE (no Series per row)
+        # A row counts as an edition first; activities attach to the latest
+        # edition above them (running count of edition rows), and activities
+        # before the first edition are dropped
+        row_type = _column_text(df, 'tipo').str.lower()
+        is_edition = row_type.str.contains('edizione', regex=False)
+        edition_no = is_edition.cumsum()
+        is_activity = (~is_edition & row_type.str.contains('attivita', regex=False)
+                       & (edition_no > 0))
+
+        ed = df[is_edition]
+        editions_list = [
+            {
+                'course_name': course_name,
+                'edition_title': edition_title,
+                'start_date': start_date,
+                'end_date': end_date,
+                'location': location,
+                'supplier': supplier,
+                'price': price,
+                'description': '',
+                'activities': []
+            }
+            for course_name, edition_title, start_date, end_date, location, supplier, price in zip(
+                _column_text(ed, 'nome_corso'), _column_text(ed, 'titolo'),
+                _column_dates(ed, 'data_inizio'), _column_dates(ed, 'data_fine'),
+                _column_text(ed, 'aula'), _column_text(ed, 'fornitore'),
+                _column_text(ed, 'costo'))
+        ]
 
-        # Don't forget the last edition
-        if current_edition:
-            editions_list.append(current_edition)
+        act = df[is_activity]
+        for number, title, description, act_date, start_time, end_time, hours in zip(
+                edition_no[is_activity].tolist(),
+                _column_text(act, 'titolo'), _column_text(act, 'descrizione'),
+                _column_dates(act, 'data'),
+                _column_text(act, 'ora_inizio', '09.00', strip=False).str.replace(':', '.', regex=False),
+                _column_text(act, 'ora_fine', '11.00', strip=False).str.replace(':', '.', regex=False),
+                _column_text(act, 'impegno')):
+            editions_list[number - 1]['activities'].append({
+                'title': title,
+                'description': description,
+                'date': act_date,
+                'start_time': start_time,
+                'end_time': end_time,
+                'impegno_ore': hours
+            })
 
         return {
             'editions': editions_list,
@@ -2178,17 +3043,25 @@ class CourseView:
         header_count = sum(1 for v in first_col if 'nome del corso' in v or 'titolo del attivita' in v)
         return header_count >= 2
 
-    def _parse_original_format(self, excel_file) -> Optional[Dict[str, Any]]:
+    def _parse_original_format(self, df) -> Optional[Dict[str, Any]]:
         """Parse your original format with edition headers followed by activities"""
-        df = pd.read_excel(excel_file, sheet_name=0, header=None)
-
         editions_list = []
         current_edition = None
         reading_activities = False
         activity_header_row = None
 
-        for idx, row in df.iterrows():
-            first_cell = str(row.iloc[0]).strip().lower() if pd.notna(row.iloc[0]) else ''
+        # One object array + one NA mask up front: rows are plain NumPy rows,
+        # not a Series each (iterrows), and NA checks are array lookups
+        # instead of a pd.notna call per cell
+        values = df.to_numpy(dtype=object)
+        na = df.isna().to_numpy()
+        ncols = df.shape[1]
+
+        def cell_text(row, row_na, j):
+            return str(row[j]).strip() if j < ncols and not row_na[j] else ''
+
+        for idx, (row, row_na) in enumerate(zip(values, na)):
+            first_cell = cell_text(row, row_na, 0).lower()
 
             # Detect edition header row
             if 'nome del corso' in first_cell:
@@ -2206,19 +3079,19 @@ class CourseView:
                 continue
 
             # Skip empty rows
-            if row.isna().all() or first_cell == '' or first_cell == 'nan':
+            if row_na.all() or first_cell == '' or first_cell == 'nan':
                 continue
 
             # Parse edition data (row after edition header)
             if current_edition is None and not reading_activities:
                 current_edition = {
-                    'course_name': str(row.iloc[0]).strip() if pd.notna(row.iloc[0]) else '',
-                    'edition_title': str(row.iloc[1]).strip() if len(row) > 1 and pd.notna(row.iloc[1]) else '',
-                    'start_date': normalize_date(row.iloc[2]) if len(row) > 2 else '',
-                    'end_date': normalize_date(row.iloc[3]) if len(row) > 3 else '',
-                    'location': str(row.iloc[4]).strip() if len(row) > 4 and pd.notna(row.iloc[4]) else '',
-                    'supplier': str(row.iloc[5]).strip() if len(row) > 5 and pd.notna(row.iloc[5]) else '',
-                    'price': str(row.iloc[6]).strip() if len(row) > 6 and pd.notna(row.iloc[6]) else '',
+                    'course_name': cell_text(row, row_na, 0),
+                    'edition_title': cell_text(row, row_na, 1),
+                    'start_date': normalize_date(row[2]) if ncols > 2 else '',
+                    'end_date': normalize_date(row[3]) if ncols > 3 else '',
+                    'location': cell_text(row, row_na, 4),
+                    'supplier': cell_text(row, row_na, 5),
+                    'price': cell_text(row, row_na, 6),
                     'description': '',
                     'centro_costo': '',
                     'direzione_pagante': '',
@@ -2233,14 +3106,12 @@ class CourseView:
             # Parse activity data
             if reading_activities and current_edition:
                 activity = {
-                    'title': str(row.iloc[0]).strip() if pd.notna(row.iloc[0]) else '',
-                    'description': str(row.iloc[1]).strip() if len(row) > 1 and pd.notna(row.iloc[1]) else '',
-                    'date': normalize_date(row.iloc[2]) if len(row) > 2 else '',
-                    'start_time': str(row.iloc[3]).replace(':', '.') if len(row) > 3 and pd.notna(
-                        row.iloc[3]) else '09.00',
-                    'end_time': str(row.iloc[4]).replace(':', '.') if len(row) > 4 and pd.notna(
-                        row.iloc[4]) else '11.00',
-                    'impegno_ore': str(row.iloc[6]).strip() if len(row) > 6 and pd.notna(row.iloc[6]) else ''
+                    'title': cell_text(row, row_na, 0),
+                    'description': cell_text(row, row_na, 1),
+                    'date': normalize_date(row[2]) if ncols > 2 else '',
+                    'start_time': str(row[3]).replace(':', '.') if ncols > 3 and not row_na[3] else '09.00',
+                    'end_time': str(row[4]).replace(':', '.') if ncols > 4 and not row_na[4] else '11.00',
+                    'impegno_ore': cell_text(row, row_na, 6)
                 }
                 if activity['title']:  # Only add if has title
                     current_edition['activities'].append(activity)
@@ -2258,6 +3129,7 @@ class CourseView:
     #---EDITION + ACTIVITY---
     def _parse_two_sheet_edition_excel(self, excel_file) -> Optional[Dict[str, Any]]:
         """Parse two-sheet format (Edizioni + Attivita sheets)"""
+        import pandas as pd
         try:
             # Find sheet names (case-insensitive)
             edizioni_sheet = None
@@ -2278,8 +3150,8 @@ class CourseView:
             df_attivita = pd.read_excel(excel_file, sheet_name=attivita_sheet, header=0)
 
             # Normalize column names
-            df_edizioni.columns = df_edizioni.columns.str.strip().str.lower()
-            df_attivita.columns = df_attivita.columns.str.strip().str.lower()
+            df_edizioni.columns = _normalized_columns(df_edizioni.columns)
+            df_attivita.columns = _normalized_columns(df_attivita.columns)
 
             st.info(f"📊 Colonne Edizioni: {', '.join(df_edizioni.columns)}")
             st.info(f"📊 Colonne Attività: {', '.join(df_attivita.columns)}")
@@ -2322,11 +3194,9 @@ class CourseView:
             }
 
             # Find actual column names
-            def find_column(df, possible_names):
-                for name in possible_names:
-                    if name in df.columns:
-                        return name
-                return None
+            # col_set: frozenset snapshot of one sheet's headers, built once
+            def find_column(col_set, possible_names):
+                return next((n for n in possible_names if n in col_set), None)
 
             def safe_val(row, col_key, cols_dict):
                 """Safely extract value from row, returning empty string for None/NaN/Ellipsis"""
@@ -2345,21 +3215,27 @@ class CourseView:
                 # Remove "nan" strings
                 return '' if result.lower() == 'nan' else result
 
-            edition_cols = {k: find_column(df_edizioni, v) for k, v in edition_mappings.items()}
-            activity_cols = {k: find_column(df_attivita, v) for k, v in activity_mappings.items()}
+            edition_col_set = frozenset(df_edizioni.columns)
+            activity_col_set = frozenset(df_attivita.columns)
+            edition_cols = {k: find_column(edition_col_set, v) for k, v in edition_mappings.items()}
+            activity_cols = {k: find_column(activity_col_set, v) for k, v in activity_mappings.items()}
 
             # Parse editions
+            # Rows missing a required field are dropped in ONE vectorized
+            # dropna before the loop (index kept, so "Riga N" stays right);
+            # if a required column is missing altogether, no row qualifies
+            required_cols = [edition_cols[k] for k in ('course_name', 'start_date', 'end_date')]
+            if all(required_cols):
+                df_edizioni_valid = df_edizioni.dropna(subset=required_cols)
+            else:
+                df_edizioni_valid = df_edizioni.iloc[0:0]
+
             editions_list = []
-            for idx, row in df_edizioni.iterrows():
+            for idx, row in df_edizioni_valid.iterrows():
                 edition_id = str(row[edition_cols['id']]) if edition_cols['id'] else f"E{idx + 1}"
 
-                # Validate required fields
-                course_name = row[edition_cols['course_name']] if edition_cols['course_name'] else None
-                start_date = row[edition_cols['start_date']] if edition_cols['start_date'] else None
-                end_date = row[edition_cols['end_date']] if edition_cols['end_date'] else None
-
-                if pd.isna(course_name) or pd.isna(start_date) or pd.isna(end_date):
-                    continue
+                start_date = row[edition_cols['start_date']]
+                end_date = row[edition_cols['end_date']]
 
                 # Normalize dates
                 start_date_str = normalize_date(start_date)
@@ -2390,52 +3266,57 @@ class CourseView:
                 editions_list.append(edition)
 
             # Parse activities and link to editions
-            for idx, row in df_attivita.iterrows():
-                edition_id = str(row[activity_cols['edition_id']]) if activity_cols['edition_id'] else None
+            # id -> edition, first one wins (as the old linear scan did)
+            editions_by_id = {}
+            for edition in editions_list:
+                editions_by_id.setdefault(edition['id'], edition)
+
+            # Resolve each row's edition FIRST (dict hit, not a scan): only
+            # linked rows are read further, so blank separator rows and orphan
+            # activities are skipped before any cell conversion, as before
+            if activity_cols['edition_id']:
+                linked = [editions_by_id.get(str(v))
+                          for v in df_attivita[activity_cols['edition_id']].tolist()]
+                df_linked = df_attivita.loc[[e is not None for e in linked]]
+                linked = [e for e in linked if e is not None]
+            else:
+                linked, df_linked = [], df_attivita.iloc[0:0]
 
-                if not edition_id:
-                    continue
+            # Whole columns pulled once and zipped: no Series per row (iterrows)
+            # and NA masks computed per column instead of pd.notna per cell
+            num_activities = len(df_linked)
 
-                # Find the edition this activity belongs to
-                for edition in editions_list:
-                    if edition['id'] == edition_id:
-                        activity_date = row[activity_cols['date']] if activity_cols['date'] else None
-                        date_str = normalize_date(activity_date) if activity_date else ''
-
-                        # Format times
-                        start_time = row[activity_cols['start_time']] if activity_cols['start_time'] else '09.00'
-                        end_time = row[activity_cols['end_time']] if activity_cols['end_time'] else '11.00'
-
-                        # Convert time format if needed
-                        if isinstance(start_time, (int, float)):
-                            hours = int(start_time)
-                            minutes = int((start_time - hours) * 60)
-                            start_time = f"{hours:02d}.{minutes:02d}"
-                        else:
-                            start_time = str(start_time).replace(':', '.')
+            def activity_column(key, default=None):
+                col = activity_cols[key]
+                return df_linked[col].tolist() if col else [default] * num_activities
 
-                        if isinstance(end_time, (int, float)):
-                            hours = int(end_time)
-                            minutes = int((end_time - hours) * 60)
-                            end_time = f"{hours:02d}.{minutes:02d}"
-                        else:
-                            end_time = str(end_time).replace(':', '.')
-
-                        activity = {
-                            'title': str(row[activity_cols['title']]).strip() if activity_cols['title'] and pd.notna(
-                                row[activity_cols['title']]) else f'Attività {len(edition["activities"]) + 1}',
-                            'description': str(row[activity_cols['description']]).strip() if activity_cols[
-                                                                                                 'description'] and pd.notna(
-                                row[activity_cols['description']]) else '',
-                            'date': date_str,
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'impegno_ore': str(row[activity_cols['hours']]).strip() if activity_cols[
-                                                                                           'hours'] and pd.notna(
-                                row[activity_cols['hours']]) else ''
-                        }
-                        edition['activities'].append(activity)
-                        break
+            def activity_times(key, default):
+                col = activity_cols[key]
+                return _excel_time_texts(df_linked[col]) if col else [default] * num_activities
+
+            def activity_notna(key):
+                col = activity_cols[key]
+                return df_linked[col].notna().tolist() if col else [False] * num_activities
+
+            for (edition, activity_date, start_time, end_time, title, has_title,
+                 description, has_description, hours, has_hours) in zip(
+                    linked, activity_column('date'),
+                    activity_times('start_time', '09.00'), activity_times('end_time', '11.00'),
+                    activity_column('title'), activity_notna('title'),
+                    activity_column('description'), activity_notna('description'),
+                    activity_column('hours'), activity_notna('hours')):
+                date_str = normalize_date(activity_date) if activity_date else ''
+
+                activity = {
+                    'title': str(title).strip() if has_title
+                    else f'Attività {len(edition["activities"]) + 1}',
+                    'description': str(description).strip() if has_description else '',
+                    'date': date_str,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'impegno_ore': str(hours).strip() if has_hours else ''
+                }
+                edition['activities'].append(activity)
 
             if not editions_list:
                 st.error("❌ Nessuna edizione valida trovata")
@@ -2461,7 +3342,6 @@ class CourseView:
 
         except Exception as e:
             st.error(f"❌ Errore parsing: {str(e)}")
-            import traceback
             st.code(traceback.format_exc())
             return None
 
@@ -2477,366 +3357,27 @@ class CourseView:
         3. Once we find WHERE a label is, we extract the VALUE after it using
            simple string slicing + regex cleanup
         4. This means "costo 1000 aula Roma" and "aula Roma costo 1000" both work
+
+        Steps 1-4 live in _parse_edition_nlp_text (cached on the sentence).
         """
-        import re
         try:
             import spacy
-            from spacy.matcher import Matcher
         except ImportError:
             st.warning("⚠️ SpaCy non disponibile. Uso regex di fallback.")
             return self._parse_edition_nlp_regex_fallback(text)
 
-        # =========================================================
-        # STEP 1: Load the Italian spaCy model
-
-        try:
-            nlp = spacy.load("it_core_news_sm")
-        except OSError:
-            nlp = spacy.blank("it")
-
-        # =========================================================
-        # STEP 2: Process the text
-        doc = nlp(text.lower())  # lowercase for case-insensitive matching
-
-        # =========================================================
-        # STEP 3: Define field patterns using spaCy Matcher
-        matcher = Matcher(nlp.vocab)
-
-        # Define all field label patterns
-        # Each tuple: (field_name, list_of_pattern_variants)
-        field_patterns = {
-            'corso': [
-                [{"LOWER": "corso"}],
-                [{"LOWER": "nome"}, {"LOWER": "corso"}],
-                [{"LOWER": "per"}, {"LOWER": "corso"}],
-            ],
-            'titolo': [
-                [{"LOWER": "titolo"}],
-                [{"LOWER": "titolo"}, {"LOWER": "edizione"}],
-            ],
-            'data_inizio': [
-                [{"LOWER": "data"}, {"LOWER": "inizio"}],
-                [{"LOWER": "inizio"}],
-                [{"LOWER": "dal"}],
-            ],
-            'data_fine': [
-                [{"LOWER": "data"}, {"LOWER": "fine"}],
-                [{"LOWER": "fine"}],
-                [{"LOWER": "al"}],
-            ],
-            'aula': [
-                [{"LOWER": "aula"}],
-                [{"LOWER": "luogo"}],
-                [{"LOWER": "sede"}],
-            ],
-            'fornitore': [
-                [{"LOWER": "fornitore"}],
-                [{"LOWER": "erogato"}, {"LOWER": "da"}],
-            ],
-            'costo': [
-                [{"LOWER": "costo"}],
-                [{"LOWER": "prezzo"}],
-                [{"LOWER": "€"}],
-            ],
-            'descrizione': [
-                [{"LOWER": "descrizione"}],
-                [{"LOWER": "desc"}],
-            ],
-            'centro_costo': [
-                [{"LOWER": "centro"}, {"LOWER": "di"}, {"LOWER": "costo"}],
-                [{"LOWER": "centro"}, {"LOWER": "costo"}],
-                [{"LOWER": "cdc"}],
-            ],
-            'societa_pagante': [
-                [{"LOWER": "società"}, {"LOWER": "pagante"}],
-                [{"LOWER": "societa"}, {"LOWER": "pagante"}],
-                [{"LOWER": "societa'"}, {"LOWER": "pagante"}],  # with apostrophe
-                [{"LOWER": "societa"}, {"IS_PUNCT": True, "OP": "?"}, {"LOWER": "pagante"}],
-                [{"TEXT": {"REGEX": "socie[tà]+"}, "OP": "?"}, {"LOWER": "pagante"}],
-            ],
-            'direzione_pagante': [
-                [{"LOWER": "direzione"}, {"LOWER": "pagante"}],
-            ],
-            'servizio_pagante': [
-                [{"LOWER": "servizio"}, {"LOWER": "pagante"}],
-            ],
-            'sottotipologia': [
-                [{"LOWER": "sottotipologia"}],
-                [{"LOWER": "sotto"}, {"LOWER": "tipologia"}],  # keeps two-word variant
-                [{"LOWER": "sottotipo"}],
-            ],
-            'finanziata': [
-                [{"LOWER": "finanziata"}],
-                [{"LOWER": "finanziato"}],
-            ],
-            'attivita_marker': [
-                [{"LOWER": "attività"}, {"IS_PUNCT": True, "OP": "?"}],
-                [{"LOWER": "attivita"}, {"IS_PUNCT": True, "OP": "?"}],
-                [{"LOWER": "attività"}, {"LOWER": ":"}],
-            ],
-        }
-
-        # Add all patterns to matcher
-        for field_name, patterns in field_patterns.items():
-            matcher.add(field_name, patterns)
-
-        # =========================================================
-        # STEP 4: Run the matcher and collect all matches with positions
-        matches = matcher(doc)
+        parsed = _parse_edition_nlp_text(text)
 
-        # =========================================================
-        # STEP 5: Convert matches to character positions
-        field_positions = {}  # {field_name: char_position_after_label}
-
-        for match_id, start, end in matches:
-            field_name = nlp.vocab.strings[match_id]
-            # doc[end-1].idx = start of last token, doc[end-1].__len__ = length
-            last_token = doc[end - 1]
-            char_pos_after_label = last_token.idx + len(last_token.text)
-
-            # Keep only the FIRST occurrence of each field
-            if field_name not in field_positions:
-                field_positions[field_name] = char_pos_after_label
-
-        # =========================================================
-        # STEP 6: Sort fields by position in text
-        original_text = text
-
-        sorted_fields = sorted(field_positions.items(), key=lambda x: x[1])
-
-        def extract_value_between(start_pos, end_pos=None):
-            if end_pos:
-                raw = original_text[start_pos:end_pos]
-            else:
-                raw = original_text[start_pos:]
-            raw = re.sub(r'^[\s:,\-–]+', '', raw)
-            raw = re.sub(r'[\s,]+$', '', raw)
-            if len(raw.strip()) < 2:
-                return ''
-            return raw.strip()
-
-        # ✅ FUNCTION ENDS HERE — next lines are at method level
-
-        # =========================================================
-        # STEP 7: Extract simple fields using spaCy positions
-        # =========================================================
-        extracted = {}
-
-        simple_fields = ['corso', 'titolo', 'data_inizio', 'data_fine',
-                         'aula', 'fornitore', 'costo', 'descrizione']
-
-        simple_positions = [(f, p) for f, p in sorted_fields
-                            if f in simple_fields]
-
-        for i, (field_name, start_pos) in enumerate(simple_positions):
-            end_pos = None
-            if i + 1 < len(simple_positions):
-                next_field_name, _ = simple_positions[i + 1]
-                next_patterns = field_patterns.get(next_field_name, [])
-                for pattern in next_patterns:
-                    candidate = ' '.join(
-                        p.get('LOWER', '') for p in pattern
-                        if p.get('LOWER'))
-                    if not candidate:
-                        continue
-                    idx = original_text.lower().find(
-                        candidate.lower(), start_pos)
-                    if idx != -1:
-                        end_pos = idx
-                        break
-            value = extract_value_between(start_pos, end_pos)
-            extracted[field_name] = value
-
-        # =========================================================
-        # OVERRIDE: Extract all simple fields with regex
-        # =========================================================
-        corso_match = re.search(
-            r'(?:per\s+)?corso\s+(.+?)'
-            r'(?=\s+titolo\s+|\s+data\s+inizio|\s+data\s+fine'
-            r'|\s+aula\s+|\s+fornitore\s+|\s+costo\s+|$)',
-            original_text, re.IGNORECASE)
-        if corso_match:
-            extracted['corso'] = corso_match.group(1).strip()
-
-        titolo_match = re.search(
-            r'\btitolo\s+(.+?)'
-            r'(?=\s+data\s+inizio|\s+data\s+fine'
-            r'|\s+aula\s+|\s+fornitore\s+|\s+costo\s+|$)',
-            original_text, re.IGNORECASE)
-        if titolo_match:
-            extracted['titolo'] = titolo_match.group(1).strip()
-
-        data_inizio_match = re.search(
-            r'data\s+inizio\s+(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{4})',
-            original_text, re.IGNORECASE)
-        if data_inizio_match:
-            extracted['data_inizio'] = data_inizio_match.group(1)
-
-        data_fine_match = re.search(
-            r'data\s+fine\s+(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{4})',
-            original_text, re.IGNORECASE)
-        if data_fine_match:
-            extracted['data_fine'] = data_fine_match.group(1)
-
-        aula_match = re.search(
-            r'\baula\s+(.+?)'
-            r'(?=\s+fornitore\s+|\s+costo\s+|\s+con\s+|\s+attività|$)',
-            original_text, re.IGNORECASE)
-        if aula_match:
-            extracted['aula'] = aula_match.group(1).strip()
-
-        fornitore_match = re.search(
-            r'\bfornitore\s+(.+?)'
-            r'(?=\s+costo\s+|\s+con\s+|\s+aula\s+|\s+attività|$)',
-            original_text, re.IGNORECASE)
-        if fornitore_match:
-            extracted['fornitore'] = fornitore_match.group(1).strip()
-
-        costo_match_val = re.search(
-            r'\bcosto\s+(\d+(?:[.,]\d+)?)',
-            original_text, re.IGNORECASE)
-        if costo_match_val:
-            extracted['costo'] = costo_match_val.group(1)
-
-        # =========================================================
-        # STEP 8: Parse attributi aggiuntivi with REGEX
-        # =========================================================
-        aggiuntivi_raw = ''
-
-        aggiuntivi_match = re.search(
-            r'\bcon\b(.+?)(?=attività\s*:|attivita\s*:|$)',
-            original_text, re.IGNORECASE | re.DOTALL)
-
-        if aggiuntivi_match:
-            aggiuntivi_raw = aggiuntivi_match.group(1)
-        else:
-            costo_fallback = re.search(
-                r'costo\s+\d+(.+?)(?=attività\s*:|attivita\s*:|$)',
-                original_text, re.IGNORECASE | re.DOTALL)
-            if costo_fallback:
-                aggiuntivi_raw = costo_fallback.group(1)
-
-        def extract_aggiuntivi_field(pattern, text):
-            m = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-            if not m:
-                return ''
-            return text[m.start(1):m.end(1)].strip().strip(',').strip()
-
-        centro_costo = extract_aggiuntivi_field(
-            r'centro\s+di\s+costo\s*[-–:]\s*([^,\n]+?)(?=\s*\w+\s*pagante|,|attività|$)',
-            aggiuntivi_raw)
-
-        direzione_pagante = extract_aggiuntivi_field(
-            r'direzione\s+pagante\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)',
-            aggiuntivi_raw)
-
-        finanziata_raw = extract_aggiuntivi_field(
-            r'finanziata\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)',
-            aggiuntivi_raw)
-
-        servizio_pagante = extract_aggiuntivi_field(
-            r'servizio\s+pagante\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)',
-            aggiuntivi_raw)
-
-        sottotipologia = extract_aggiuntivi_field(
-            r'sottotipologia\s*[-–:]\s*([^,\n]+?)(?=,|attività|$)',
-            aggiuntivi_raw)
-
-        societa_pagante = extract_aggiuntivi_field(
-            r"socie(?:t[aà]['\u2019]?)\s*pagante\s*[-–:]\s*([^,\n]+?)(?=\s*attività|\s*attivita|,|$)",
-            aggiuntivi_raw)
-
-        if not societa_pagante:
-            societa_fallback = re.search(
-                r"socie(?:t[aà]['\u2019]?)\s*pagante\s*[-–:]\s*([^,\n]+?)(?=\s*attività|\s*attivita|,|$)",
-                original_text, re.IGNORECASE)
-            if societa_fallback:
-                societa_pagante = original_text[
-                                  societa_fallback.start(1):societa_fallback.end(1)
-                                  ].strip().strip(',').strip()
-        if finanziata_raw.lower() in ['si', 'sì', 'yes', 's']:
-            finanziata_val = 'Sì'
-        elif finanziata_raw.lower() in ['no', 'n']:
-            finanziata_val = 'No'
-        else:
-            finanziata_val = finanziata_raw.strip()
-
-        # =========================================================
-        # STEP 9: Parse activities
-        # =========================================================
-        activities = []
-        attivita_match = re.search(
-            r'attività\s*[:\-]\s*(.+?)$',
-            original_text, re.IGNORECASE | re.DOTALL)
-
-        if attivita_match:
-            activities_text = attivita_match.group(1)
-            activity_pattern = re.compile(
-                r'([^,]+?)'  # title
-                r'(\d{1,2}[/\-.]\d{1,2}[/\-.]\d{4})'  # date
-                r'[^0-9]*ore\s*'  # 'ore' keyword
-                r'(\d{1,2}[.:]\d{2})'  # start time
-                r'\s*[-–]\s*'  # separator
-                r'(\d{1,2}[.:]\d{2})'  # end time
-                r'(?:[^,\d]*?(\d+(?:[.,]\d+)?)\s*ore)?',  # ★ optional impegno
-                re.IGNORECASE)
-            for match in activity_pattern.finditer(activities_text):
-                title = match.group(1).strip().strip(',').strip()
-                date_str = normalize_date(match.group(2))
-                start_time = match.group(3).replace(':', '.')
-                end_time = match.group(4).replace(':', '.')
-                impegno_val = match.group(5) if match.group(5) else ''  # ★ NEW
-                if title and date_str:
-                    activities.append({
-                        'title': title,
-                        'description': '',
-                        'date': date_str,
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'impegno_ore': impegno_val  # ★ was ''
-                    })
-        # =========================================================
-        # STEP 10: Clean and build final result
-        # =========================================================
-        def clean(val):
-            if not val:
-                return ''
-            val = re.sub(r'\battività\b.*', '', val,
-                         flags=re.IGNORECASE).strip()
-            return val.strip(' ,;:-–')
-
-        course_name = clean(extracted.get('corso', ''))
-        start_date = clean(extracted.get('data_inizio', ''))
-        end_date = clean(extracted.get('data_fine', ''))
-
-        if not course_name:
+        if not parsed['course_name']:
             st.error("❌ Nome corso non trovato. Scrivi 'corso [nome]'.")
             return None
 
-        start_date_str = normalize_date(start_date) if start_date else ''
-        end_date_str = normalize_date(end_date) if end_date else ''
-
-        if not start_date_str or not end_date_str:
+        if not parsed['start_date'] or not parsed['end_date']:
             st.error("❌ Date non trovate. Usa formato GG/MM/AAAA.")
             return None
 
-        return {
-            'course_name': course_name,
-            'edition_title': clean(extracted.get('titolo', '')),
-            'start_date': start_date_str,
-            'end_date': end_date_str,
-            'location': clean(extracted.get('aula', '')),
-            'supplier': clean(extracted.get('fornitore', '')),
-            'price': clean(extracted.get('costo', '')),
-            'description': clean(extracted.get('descrizione', '')),
-            'centro_costo': centro_costo,
-            'societa_pagante': societa_pagante,
-            'direzione_pagante': direzione_pagante,
-            'servizio_pagante': servizio_pagante,
-            'sottotipologia': sottotipologia,
-            'finanziata': finanziata_val,
-            'activities': activities,
-        }
+        # cache_data hands out a fresh copy, so callers may mutate it
+        return parsed
 
 
     def _parse_edition_nlp_input_regex(self, text: str) -> Optional[Dict[str, Any]]:
@@ -2855,8 +3396,6 @@ class CourseView:
          secondo giorno 13/02/2026 ore 10.00-12.00 4 ore"
 
         """
-        import re
-
         parsed = {
             'course_name': '',
             'edition_title': '',
@@ -2876,38 +3415,26 @@ class CourseView:
             'societa_pagante': '',
         }
 
-        text_lower = text.lower()
-        original_text = text
-
         # Extract course name
-        course_patterns = [
-            r'(?:corso|per corso|del corso)\s+["\']?([^"\']+?)["\']?\s+(?:titolo|data|edizione)',
-            r'corso\s+([A-Za-z0-9\s]+?)(?:\s+titolo|\s+data|\s+edizione|,|$)',
-        ]
-        for pattern in course_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in _EDR_COURSE_RES:
+            match = pattern.search(text)
             if match:
                 parsed['course_name'] = match.group(1).strip().title()
                 break
 
         # Extract edition title
-        title_patterns = [
-            r'titolo\s+["\']?([^"\']+?)["\']?\s+(?:data|aula|fornitore|attività)',
-            r'titolo\s+([^,]+?)(?:,|\s+data)',
-        ]
-        for pattern in title_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in _EDR_TITLE_RES:
+            match = pattern.search(text)
             if match:
                 parsed['edition_title'] = match.group(1).strip().title()
                 break
 
         # Extract dates
-        date_pattern = r'(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})'
-        dates = re.findall(date_pattern, text)
+        dates = _EDR_DATE_RE.findall(text)
 
         # Try to identify start and end dates
-        start_match = re.search(r'(?:data\s+)?inizio\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})', text_lower)
-        end_match = re.search(r'(?:data\s+)?fine\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})', text_lower)
+        start_match = _EDR_START_RE.search(text)
+        end_match = _EDR_END_RE.search(text)
 
         if start_match:
             parsed['start_date'] = normalize_date(start_match.group(1)) or ''
@@ -2920,93 +3447,59 @@ class CourseView:
             parsed['end_date'] = normalize_date(dates[1]) or ''
 
         # Extract location
-        location_match = re.search(r'aula\s+([^,]+?)(?:,|\s+fornitore|\s+costo|\s+attività|$)', text_lower)
+        location_match = _EDR_LOCATION_RE.search(text)
         if location_match:
             parsed['location'] = location_match.group(1).strip().title()
 
         # Extract supplier
-        supplier_match = re.search(r'fornitore\s+([^,]+?)(?:,|\s+costo|\s+aula|\s+attività|$)', text_lower)
+        supplier_match = _EDR_SUPPLIER_RE.search(text)
         if supplier_match:
             parsed['supplier'] = supplier_match.group(1).strip().title()
 
         # Extract price
-        price_match = re.search(r'(?:costo|prezzo)\s+(\d+)', text_lower)
+        price_match = _EDR_PRICE_RE.search(text)
         if price_match:
             parsed['price'] = price_match.group(1)
 
         # --- Centro di Costo ---
-        centro_costo_match = re.search(
-            r'centro\s+di\s+costo\s*[-–:]\s*([^,]+?)(?:,|\s+direzione|\s+finanziata|$)',
-            text_lower)
+        centro_costo_match = _EDR_CENTRO_COSTO_RE.search(text)
         if centro_costo_match:
-            start = centro_costo_match.start(1)
-            end = centro_costo_match.end(1)
-            parsed['centro_costo'] = text[start:end].strip()
+            parsed['centro_costo'] = centro_costo_match.group(1).strip()
 
         # --- Direzione Pagante ---
-        direzione_match = re.search(
-            r'direzione\s+pagante\s*[-–:]\s*([^,]+?)(?:,|\s+finanziata|\s+servizio|$)',
-            text_lower)
+        direzione_match = _EDR_DIREZIONE_RE.search(text)
         if direzione_match:
-            start = direzione_match.start(1)
-            end = direzione_match.end(1)
-            parsed['direzione_pagante'] = text[start:end].strip()
+            parsed['direzione_pagante'] = direzione_match.group(1).strip()
 
         # --- Finanziata ---
-        finanziata_match = re.search(
-            r'finanziata\s*[-–:]\s*(s[iì]|no)',
-            text_lower)
+        finanziata_match = _EDR_FINANZIATA_RE.search(text)
         if finanziata_match:
             val = finanziata_match.group(1).strip().lower()
             parsed['finanziata'] = 'Sì' if val in ['si', 'sì'] else 'No'
 
         # --- Servizio Pagante ---
-        servizio_match = re.search(
-            r'servizio\s+pagante\s*[-–:]\s*([^,]+?)(?:,|\s+sottotipologia|\s+societ|$)',
-            text_lower)
+        servizio_match = _EDR_SERVIZIO_RE.search(text)
         if servizio_match:
-            start = servizio_match.start(1)
-            end = servizio_match.end(1)
-            parsed['servizio_pagante'] = text[start:end].strip()
+            parsed['servizio_pagante'] = servizio_match.group(1).strip()
 
         # --- Sottotipologia ---
-        sottotipologia_match = re.search(
-            r'sottotipologia\s*[-–:]\s*([^,]+?)(?:,|\s+societ|$)',
-            text_lower)
+        sottotipologia_match = _EDR_SOTTOTIPOLOGIA_RE.search(text)
         if sottotipologia_match:
-            start = sottotipologia_match.start(1)
-            end = sottotipologia_match.end(1)
-            parsed['sottotipologia'] = text[start:end].strip()
+            parsed['sottotipologia'] = sottotipologia_match.group(1).strip()
 
         # --- Società Pagante ---
-        societa_match = re.search(
-            r"societ[àa]['\u2019]?\s+pagante\s*[-–:]\s*([^,]+?)(?:,|\s+attivit|$)",
-            text_lower)
+        societa_match = _EDR_SOCIETA_RE.search(text)
         if societa_match:
-            start = societa_match.start(1)
-            end = societa_match.end(1)
-            parsed['societa_pagante'] = text[start:end].strip()
+            parsed['societa_pagante'] = societa_match.group(1).strip()
         # Extract activities
         # Pattern: "primo giorno 12/02/2026 ore 09.00-11.00" or similar
-        activity_section = re.search(r'attività[:\s]+(.+)', text_lower, re.DOTALL)
+        activity_section = _EDR_ACTIVITY_SECTION_RE.search(text)
         if activity_section:
             activity_text = activity_section.group(1)
 
             # Find individual activities
-            activity_patterns = [
-                # Pattern A: "primo giorno 12/02/2026 ore 09.00-11.00 [impegno N ore]"
-                r'(\w+\s+giorno)\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})'
-                r'\s+(?:ore\s+)?(\d{1,2}[.:]\d{2})\s*[-–]\s*(\d{1,2}[.:]\d{2})'
-                r'(?:[^,\d]*?(\d+(?:[.,]\d+)?)\s*ore)?',  # ★
-                # Pattern B: "giorno 1 12/02/2026 ore 09.00-11.00 [impegno N ore]"
-                r'(giorno\s+\d+|day\s+\d+)\s+(\d{1,2}[./-]\d{1,2}[./-]\d{2,4})'
-                r'\s+(?:ore\s+)?(\d{1,2}[.:]\d{2})\s*[-–]\s*(\d{1,2}[.:]\d{2})'
-                r'(?:[^,\d]*?(\d+(?:[.,]\d+)?)\s*ore)?',  # ★
-            ]
-
-            for pattern in activity_patterns:
-                matches = re.findall(pattern, activity_text)
-                for match in matches:
+            for pattern in _EDR_ACTIVITY_RES:
+                for match in pattern.findall(activity_text):
                     # ★ Each match now has 5 elements instead of 4
                     title, date_str, start_time, end_time, impegno_val = match
                     parsed['activities'].append({
@@ -3019,7 +3512,7 @@ class CourseView:
                     })
         # If no activities found, try to detect number of days
         if not parsed['activities']:
-            days_match = re.search(r'(\d+)\s+(?:giorni|days|attività)', text_lower)
+            days_match = _EDR_DAYS_RE.search(text)
             if days_match and parsed['start_date']:
                 num_days = int(days_match.group(1))
                 start_date_obj = datetime.strptime(parsed['start_date'], "%d/%m/%Y")
@@ -3039,50 +3532,45 @@ class CourseView:
 
     def _preserve_activity_data(self, num_activities):
         """Preserve current activity data before form submission"""
-        # CRITICAL: Also preserve the count itself
-        st.session_state.preserved_activity_data["_count"] = num_activities
-
-        for i in range(num_activities):
-            key_prefix = f"activity_{i}"
-            st.session_state.preserved_activity_data[f"{key_prefix}_title"] = \
-                st.session_state.get(f"activity_title_{i}", "")
-            st.session_state.preserved_activity_data[f"{key_prefix}_desc"] = \
-                st.session_state.get(f"activity_desc_{i}", "")
-            st.session_state.preserved_activity_data[f"{key_prefix}_date"] = \
-                st.session_state.get(f"activity_date_{i}", "")
-            st.session_state.preserved_activity_data[f"{key_prefix}_start"] = \
-                st.session_state.get(f"activity_start_time_{i}", "09.00")
-            st.session_state.preserved_activity_data[f"{key_prefix}_end"] = \
-                st.session_state.get(f"activity_end_time_{i}", "11.00")
-            st.session_state.preserved_activity_data[f"{key_prefix}_ore"] = \
-                st.session_state.get(f"impegno_previsto_in_ore_{i}", "")
+        # NOTE: currently unused - the call in _process_structured_edition_submission
+        # is commented out; kept in step with _restore_activity_data.
+        ss = st.session_state
+        # Rows are dense 0..N-1 -> a list indexed by row, one tuple per row in
+        # _ACTIVITY_FIELDS order. CRITICAL: also preserve the count itself.
+        # A fresh dict drops "_restored_once" -> the next render restores it.
+        ss.preserved_activity_data = {
+            "_count": num_activities,
+            "rows": [tuple(ss.get(key, default)
+                           for key, default in zip(keys, _ACTIVITY_FIELD_DEFAULTS))
+                     for keys in _ACTIVITY_KEYS[:num_activities]],
+        }
 
     def _restore_activity_data(self, num_activities):
         """Restore preserved activity data to form fields"""
+        ss = st.session_state
+        preserved = ss.preserved_activity_data
+
+        # Already restored since the last preserve, or no rows stored -> skip.
+        # NOTE: currently unused - the call in _render_edition_structured_form is
+        # commented out, so this gate has no runtime effect today.
+        if preserved.get("_restored_once") or not preserved.get("rows"):
+            return
+
         # CRITICAL: Restore the count to show correct number of fields
-        if "_count" in st.session_state.preserved_activity_data:
-            restored_count = st.session_state.preserved_activity_data["_count"]
+        count_to_restore = num_activities
+        if "_count" in preserved:
+            count_to_restore = preserved["_count"]
             # Update num_activities to match what was preserved
-            if st.session_state.num_activities != restored_count:
-                st.session_state.num_activities = restored_count
+            if ss.num_activities != count_to_restore:
+                ss.num_activities = count_to_restore
 
-        # Use the restored count for the loop
-        count_to_restore = st.session_state.num_activities
-        for i in range(count_to_restore):
-            key_prefix = f"activity_{i}"
-            if f"{key_prefix}_title" in st.session_state.preserved_activity_data:
-                st.session_state[f"activity_title_{i}"] = \
-                    st.session_state.preserved_activity_data[f"{key_prefix}_title"]
-                st.session_state[f"activity_desc_{i}"] = \
-                    st.session_state.preserved_activity_data[f"{key_prefix}_desc"]
-                st.session_state[f"activity_date_{i}"] = \
-                    st.session_state.preserved_activity_data[f"{key_prefix}_date"]
-                st.session_state[f"activity_start_time_{i}"] = \
-                    st.session_state.preserved_activity_data[f"{key_prefix}_start"]
-                st.session_state[f"activity_end_time_{i}"] = \
-                    st.session_state.preserved_activity_data[f"{key_prefix}_end"]
-                st.session_state[f"impegno_previsto_in_ore_{i}"] = \
-                    st.session_state.preserved_activity_data[f"{key_prefix}_ore"]
+        # Collect all widget values first, then write them in one update()
+        restored = {}
+        for keys, row in zip(_ACTIVITY_KEYS[:count_to_restore], preserved.get("rows", ())):
+            restored.update(zip(keys, row))
+        ss.update(restored)
+
+        preserved["_restored_once"] = True
 
     def _render_edition_form(self, is_disabled=False):
         """
@@ -3107,12 +3595,8 @@ class CourseView:
 
         input_method = st.radio(
             "Come vuoi inserire i dati dell'edizione?",
-            options=["structured", "excel", "nlp"],
-            format_func=lambda x: {
-                "structured": "📝 Input Strutturato (Form)",
-                "excel": "📊 Caricamento File Excel",
-                "nlp": "💬 Compilazione con AI"
-            }[x],
+            options=list(_INPUT_LABELS),
+            format_func=_INPUT_LABELS.__getitem__,
             key="edition_input_method",
             horizontal=True
         )
@@ -3134,6 +3618,7 @@ class CourseView:
         # if st.session_state.preserved_activity_data:
         #     self._restore_activity_data(st.session_state.num_activities)
 
+        st.session_state.setdefault("num_activities", 1)
         num_activities = st.number_input(
             "Quanti giorni di attività?",
             min_value=1,
@@ -3189,21 +3674,24 @@ class CourseView:
             # ✅ Add note about mandatory fields
             st.caption("* I campi Titolo e Data sono obbligatori per ogni attività. La Descrizione è facoltativa.")
 
-            for i in range(num_activities):
-                st.markdown(f"**Giorno {i + 1}**")
+            for (k_title, k_desc, k_date, k_start, k_end, k_ore), (heading, date_hint) in zip(
+                    _ACTIVITY_KEYS[:num_activities], _ACTIVITY_ROW_LABELS):
+                st.session_state.setdefault(k_start, "09.00")
+                st.session_state.setdefault(k_end, "11.00")
+                st.markdown(heading)
                 cols = st.columns([2, 1, 1, 1])
                 with cols[0]:
-                    st.text_input(f"Titolo Attività", key=f"activity_title_{i}")
+                    st.text_input(f"Titolo Attività", key=k_title)
                 with cols[1]:
-                    st.text_input(f"Data (GG/MM/AAAA)", key=f"activity_date_{i}",
-                                  placeholder=f"Data giorno {i + 1}")
+                    st.text_input(f"Data (GG/MM/AAAA)", key=k_date,
+                                  placeholder=date_hint)
                 with cols[2]:
-                    st.text_input(f"Ora Inizio (HH.MM)", key=f"activity_start_time_{i}")
+                    st.text_input(f"Ora Inizio (HH.MM)", key=k_start)
                 with cols[3]:
-                    st.text_input(f"Ora Fine (HH.MM)", key=f"activity_end_time_{i}")
+                    st.text_input(f"Ora Fine (HH.MM)", key=k_end)
 
-                st.text_area(f"Descrizione Attività (facoltativa)", key=f"activity_desc_{i}", height=100)
-                st.text_input(f"Impegno previsto in ore", key=f"impegno_previsto_in_ore_{i}")
+                st.text_area(f"Descrizione Attività (facoltativa)", key=k_desc, height=100)
+                st.text_input(f"Impegno previsto in ore", key=k_ore)
                 st.markdown("---")
 
             col1, col2 = st.columns([3, 1])
@@ -3304,156 +3792,67 @@ class CourseView:
         # ❌ REMOVE THIS LINE - Don't preserve data before validation
         # self._preserve_activity_data(num_activities)
 
-        # Get edition details
-        course_name = st.session_state.edition_course_name_key
-        edition_title = st.session_state.edition_title_key
-        start_date_str = st.session_state.edition_start_date_str_key
-        end_date_str = st.session_state.edition_end_date_str_key
-        description = st.session_state.edition_description_key
-        location = st.session_state.edition_location_key
-        supplier = st.session_state.edition_supplier_key
-        price = st.session_state.edition_price_key
-
-        # ✅ SPECIFIC ERROR MESSAGES FOR EDITION FIELDS
-        has_errors = False
-
-        if not course_name.strip():
-            st.error("❌ **Nome del Corso** è obbligatorio.")
-            has_errors = True
-
-        if not start_date_str.strip():
-            st.error("❌ **Data Inizio Edizione** è obbligatoria.")
-            has_errors = True
-
-        if not end_date_str.strip():
-            st.error("❌ **Data Fine Edizione** è obbligatoria.")
-            has_errors = True
-
-        if has_errors:
-            st.stop()
-
-        # ✅ VALIDATE DATE FORMATS WITH SPECIFIC ERRORS
-        try:
-            edition_start = datetime.strptime(start_date_str, "%d/%m/%Y").date()
-        except ValueError:
-            st.error(
-                f"❌ **Data Inizio Edizione** formato non valido: '{start_date_str}'. Usa GG/MM/AAAA (es: 01/03/2026)")
-            st.stop()
-
-        try:
-            edition_end = datetime.strptime(end_date_str, "%d/%m/%Y").date()
-        except ValueError:
-            st.error(f"❌ **Data Fine Edizione** formato non valido: '{end_date_str}'. Usa GG/MM/AAAA (es: 15/03/2026)")
-            st.stop()
+        # ONE plain-dict snapshot of the form: every read below (and the
+        # validator's) is a dict lookup, not a SessionStateProxy call.
+        snap = st.session_state.to_dict()
+
+        # SHORT-CIRCUIT: same inputs as the last validated submit -> reuse
+        # its EditionDetails and go straight to the automation
+        sig = _edition_form_sig(snap, num_activities)
+        last = snap.get('_last_edition_validated')
+        if last is not None and last[0] == sig:
+            st.session_state.update(edition_details=last[1],
+                                    app_state="RUNNING_EDITION",
+                                    edition_message="")
+            st.rerun()
 
-        if edition_end < edition_start:
-            st.error("❌ La **Data Fine Edizione** non può essere precedente alla **Data Inizio Edizione**.")
+        # Get edition details (course name stripped once, as the validator sees it)
+        course_name = snap['edition_course_name_key'].strip()
+        edition_title = snap['edition_title_key']
+        description = snap['edition_description_key']
+        location = snap['edition_location_key']
+        supplier = snap['edition_supplier_key']
+        price = snap['edition_price_key']
+
+        with st.spinner("Verifica dei dati in corso..."):
+            validation = _validate_edition(snap, num_activities)
+
+        if validation['errors']:
+            for msg in validation['errors']:
+                st.error(msg)
+            # Stop if any activity had errors
+            if validation['show_hint']:
+                st.info("💡 Correggi gli errori sopra e riprova.")
             st.stop()
 
-        # ✅ VALIDATE EACH ACTIVITY WITH SPECIFIC ERRORS
-        activities_list = []
-        all_valid = True
-
-        for i in range(num_activities):
-            activity_errors = []
-
-            title = st.session_state.get(f"activity_title_{i}", "").strip()
-            act_desc = st.session_state.get(f"activity_desc_{i}", "").strip()
-            act_date_str = st.session_state.get(f"activity_date_{i}", "").strip()
-            start_time = st.session_state.get(f"activity_start_time_{i}", "09.00").strip()
-            end_time = st.session_state.get(f"activity_end_time_{i}", "11.00").strip()
-            impegno_previsto_in_ore = st.session_state.get(f"impegno_previsto_in_ore_{i}", "").strip()
-
-            # Check each field specifically
-            if not title:
-                activity_errors.append("**Titolo** è obbligatorio")
-
-
-
-            if not act_date_str:
-                activity_errors.append("**Data** è obbligatoria")
-
-            # Show activity-specific errors
-            if activity_errors:
-                error_list = ", ".join(activity_errors)
-                st.error(f"❌ **Attività Giorno {i + 1}**: {error_list}")
-                all_valid = False
-                continue  # Check other activities too
-
-            # Validate date format
-            try:
-                act_date = datetime.strptime(act_date_str, "%d/%m/%Y").date()
-            except ValueError:
-                st.error(f"❌ **Attività Giorno {i + 1}**: Formato data non valido '{act_date_str}'. Usa GG/MM/AAAA")
-                all_valid = False
-                continue
-
-            # ── AUTO-FIX time format (Oracle requires HH.MM, e.g. 15.45) ──
-            from model import normalize_time
-
-            start_time = normalize_time(start_time) if start_time else "09.00"
-            if start_time is None:
-                st.error(
-                    f"❌ **Attività Giorno {i + 1}**: Ora inizio non "
-                    f"riconosciuta '{st.session_state.get(f'activity_start_time_{i}')}'. "
-                    f"Usa HH.MM (es: 09.00)")
-                all_valid = False
-                continue
-
-            end_time = normalize_time(end_time) if end_time else "11.00"
-            if end_time is None:
-                st.error(
-                    f"❌ **Attività Giorno {i + 1}**: Ora fine non "
-                    f"riconosciuta '{st.session_state.get(f'activity_end_time_{i}')}'. "
-                    f"Usa HH.MM (es: 11.00)")
-                all_valid = False
-                continue
-
-            # Validate activity date is within edition range
-            if act_date < edition_start or act_date > edition_end:
-                st.error(
-                    f"❌ **Attività Giorno {i + 1}**: La data ({act_date_str}) deve essere compresa tra "
-                    f"l'inizio ({start_date_str}) e la fine ({end_date_str}) dell'edizione."
-                )
-                all_valid = False
-                continue
-
-            # Activity is valid - add to list
-            activities_list.append({
-                "title": title,
-                "description": act_desc,
-                "date": act_date,
-                "start_time": start_time,
-                "end_time": end_time,
-                "impegno_previsto_in_ore": impegno_previsto_in_ore
-            })
-
-        # Stop if any activity had errors
-        if not all_valid:
-            st.info("💡 Correggi gli errori sopra e riprova.")
-            st.stop()
+        edition_start = validation['edition_start']
+        edition_end = validation['edition_end']
+        activities_list = validation['activities']
 
         # ✅ ALL VALIDATION PASSED - Now start automation
-        st.session_state.edition_details = {
-            'course_name': course_name,
-            'edition_title': edition_title,
-            'edition_start_date': edition_start,
-            'edition_end_date': edition_end,
-            'location': location,
-            'supplier': supplier,
-            'price': price,
-            'description': description,
-            'activities': activities_list,
+        edition_details = EditionDetails(
+            course_name=course_name,
+            edition_title=edition_title,
+            edition_start_date=edition_start,
+            edition_end_date=edition_end,
+            location=location,
+            supplier=supplier,
+            price=price,
+            description=description,
+            activities=activities_list,
             # NEW FIELDS:
-            'centro_costo': st.session_state.get('edition_centro_costo_key', ''),
-            'direzione_pagante': st.session_state.get('edition_direzione_pagante_key', ''),
-            'finanziata': st.session_state.get('edition_finanziata_key', ''),
-            'servizio_pagante': st.session_state.get('edition_servizio_pagante_key', ''),
-            'sottotipologia': st.session_state.get('edition_sottotipologia_key', ''),
-            'societa_pagante': st.session_state.get('edition_societa_pagante_key', ''),
-        }
-        st.session_state.app_state = "RUNNING_EDITION"
-        st.session_state.edition_message = ""
+            centro_costo=snap.get('edition_centro_costo_key', ''),
+            direzione_pagante=snap.get('edition_direzione_pagante_key', ''),
+            finanziata=snap.get('edition_finanziata_key', ''),
+            servizio_pagante=snap.get('edition_servizio_pagante_key', ''),
+            sottotipologia=snap.get('edition_sottotipologia_key', ''),
+            societa_pagante=snap.get('edition_societa_pagante_key', ''),
+        )
+        # All handoff state in ONE session_state write
+        st.session_state.update(edition_details=edition_details,
+                                _last_edition_validated=(sig, edition_details),
+                                app_state="RUNNING_EDITION",
+                                edition_message="")
         st.rerun()
 
     def _render_edition_excel_ui(self, is_disabled):
@@ -3515,6 +3914,7 @@ class CourseView:
 
     def _render_single_edition_preview(self, edition_data: Dict[str, Any]):
         """Preview for a single edition with activities — 3-table layout"""
+        import pandas as pd
 
         st.success("✅ Dati estratti con successo!")
         st.subheader("📋 Anteprima Edizione + Attività")
@@ -3599,6 +3999,7 @@ class CourseView:
         - Table 2: Attributi Aggiuntivi
         - Table 3: Attività
         """
+        import pandas as pd
         editions = batch_data.get('editions', [])
         total_editions = len(editions)
         total_activities = sum(len(e.get('activities', [])) for e in editions)
@@ -3715,12 +4116,12 @@ class CourseView:
             end_date = edition_data.get('end_date', '')
 
             if isinstance(start_date, str):
-                start_date_obj = datetime.strptime(start_date, "%d/%m/%Y").date()
+                start_date_obj = _parse_ddmmyyyy(start_date)
             else:
                 start_date_obj = start_date
 
             if isinstance(end_date, str):
-                end_date_obj = datetime.strptime(end_date, "%d/%m/%Y").date()
+                end_date_obj = _parse_ddmmyyyy(end_date)
             else:
                 end_date_obj = end_date
 
@@ -3729,37 +4130,37 @@ class CourseView:
             for act in edition_data.get('activities', []):
                 act_date = act.get('date', '')
                 if isinstance(act_date, str):
-                    act_date_obj = datetime.strptime(act_date, "%d/%m/%Y").date()
+                    act_date_obj = _parse_ddmmyyyy(act_date)
                 else:
                     act_date_obj = act_date
 
-                activities_list.append({
-                    'title': act.get('title', ''),
-                    'description': act.get('description', ''),
-                    'date': act_date_obj,
-                    'start_time': act.get('start_time', '09.00'),
-                    'end_time': act.get('end_time', '11.00'),
-                    'impegno_previsto_in_ore': act.get('impegno_ore', '') or act.get('impegno_previsto_in_ore', '')
-                })
+                activities_list.append(Activity(
+                    title=act.get('title', ''),
+                    description=act.get('description', ''),
+                    date=act_date_obj,
+                    start_time=act.get('start_time', '09.00'),
+                    end_time=act.get('end_time', '11.00'),
+                    impegno_previsto_in_ore=act.get('impegno_ore', '') or act.get('impegno_previsto_in_ore', '')
+                ))
 
             # Store in session state (format expected by presenter/model)
-            st.session_state.edition_details = {
-                'course_name': edition_data.get('course_name', ''),
-                'edition_title': edition_data.get('edition_title', ''),
-                'edition_start_date': start_date_obj,
-                'edition_end_date': end_date_obj,
-                'location': edition_data.get('location', ''),
-                'supplier': edition_data.get('supplier', ''),
-                'price': edition_data.get('price', ''),
-                'description': edition_data.get('description', ''),
-                'activities': activities_list,
-                'centro_costo': edition_data.get('centro_costo', ''),
-                'direzione_pagante': edition_data.get('direzione_pagante', ''),
-                'finanziata': edition_data.get('finanziata', ''),
-                'servizio_pagante': edition_data.get('servizio_pagante', ''),
-                'sottotipologia': edition_data.get('sottotipologia', ''),
-                'societa_pagante': edition_data.get('societa_pagante', ''),
-            }
+            st.session_state.edition_details = EditionDetails(
+                course_name=edition_data.get('course_name', ''),
+                edition_title=edition_data.get('edition_title', ''),
+                edition_start_date=start_date_obj,
+                edition_end_date=end_date_obj,
+                location=edition_data.get('location', ''),
+                supplier=edition_data.get('supplier', ''),
+                price=edition_data.get('price', ''),
+                description=edition_data.get('description', ''),
+                activities=activities_list,
+                centro_costo=edition_data.get('centro_costo', ''),
+                direzione_pagante=edition_data.get('direzione_pagante', ''),
+                finanziata=edition_data.get('finanziata', ''),
+                servizio_pagante=edition_data.get('servizio_pagante', ''),
+                sottotipologia=edition_data.get('sottotipologia', ''),
+                societa_pagante=edition_data.get('societa_pagante', ''),
+            )
 
             # Start automation
             st.session_state.app_state = "RUNNING_EDITION"
@@ -3771,7 +4172,6 @@ class CourseView:
 
         except ValueError as e:
             st.error(f"❌ Errore conversione dati: {str(e)}")
-            import traceback
             st.code(traceback.format_exc())
 
     def _render_editable_edition_form(self):
@@ -4012,17 +4412,15 @@ class CourseView:
             st.error("❌ La data di fine è obbligatoria.")
             st.stop()
 
-        # Validate dates
-        try:
-            start_date_obj = datetime.strptime(start_date, "%d/%m/%Y").date()
-            end_date_obj = datetime.strptime(end_date, "%d/%m/%Y").date()
-
-            if end_date_obj < start_date_obj:
-                st.error("❌ La data di fine non può essere prima della data di inizio.")
-                st.stop()
-        except ValueError:
+        # Validate dates (None-returning parser: no exception on bad input)
+        start_date_obj = _form_date(start_date)
+        end_date_obj = _form_date(end_date)
+        if start_date_obj is None or end_date_obj is None:
             st.error("❌ Formato data non valido. Usa GG/MM/AAAA.")
             st.stop()
+        if end_date_obj < start_date_obj:
+            st.error("❌ La data di fine non può essere prima della data di inizio.")
+            st.stop()
 
         # Collect activities
         activities_list = []
@@ -4044,43 +4442,36 @@ class CourseView:
                 st.stop()
 
             # Validate activity date
-            try:
-                act_date_obj = datetime.strptime(act_date, "%d/%m/%Y").date()
-            except ValueError:
+            act_date_obj = _form_date(act_date)
+            if act_date_obj is None:
                 st.error(f"❌ Attività {idx + 1}: Formato data non valido.")
                 st.stop()
 
-            activities_list.append({
-                'title': act_title,
-                'description': act_desc,
-                'date': act_date_obj,
-                'start_time': act_start,
-                'end_time': act_end,
-                'impegno_previsto_in_ore': act_hours
-            })
+            activities_list.append(Activity(act_title, act_desc, act_date_obj,
+                                            act_start, act_end, act_hours))
 
         if not activities_list:
             st.error("❌ Almeno una attività è richiesta.")
             st.stop()
 
         # Store and start automation
-        st.session_state.edition_details = {
-            'course_name': course_name,
-            'edition_title': edition_title,
-            'edition_start_date': start_date_obj,
-            'edition_end_date': end_date_obj,
-            'location': location,
-            'supplier': supplier,
-            'price': price,
-            'description': description,
-            'activities': activities_list,
-            'centro_costo': original_edition.get('centro_costo', ''),
-            'societa_pagante': original_edition.get('societa_pagante', ''),
-            'direzione_pagante': original_edition.get('direzione_pagante', ''),
-            'servizio_pagante': original_edition.get('servizio_pagante', ''),
-            'sottotipologia': original_edition.get('sottotipologia', ''),
-            'finanziata': original_edition.get('finanziata', ''),
-        }
+        st.session_state.edition_details = EditionDetails(
+            course_name=course_name,
+            edition_title=edition_title,
+            edition_start_date=start_date_obj,
+            edition_end_date=end_date_obj,
+            location=location,
+            supplier=supplier,
+            price=price,
+            description=description,
+            activities=activities_list,
+            centro_costo=original_edition.get('centro_costo', ''),
+            societa_pagante=original_edition.get('societa_pagante', ''),
+            direzione_pagante=original_edition.get('direzione_pagante', ''),
+            servizio_pagante=original_edition.get('servizio_pagante', ''),
+            sottotipologia=original_edition.get('sottotipologia', ''),
+            finanziata=original_edition.get('finanziata', ''),
+        )
 
         st.session_state.app_state = "RUNNING_EDITION"
         st.session_state.edition_message = ""
@@ -4133,28 +4524,35 @@ class CourseView:
     #---STUDENT---
     def _preserve_student_data(self, num_students):
         """Preserve current student data before form submission"""
-        # CRITICAL: Also preserve the count itself
-        st.session_state.preserved_student_data["_count"] = num_students
-
-        for i in range(num_students):
-            st.session_state.preserved_student_data[f"student_{i}_name"] = \
-                st.session_state.get(f"student_name_{i}", "")
+        ss = st.session_state
+        # Names as a list indexed by row. CRITICAL: also preserve the count.
+        # A fresh dict drops "_restored_once" -> the next render restores it.
+        ss.preserved_student_data = {
+            "_count": num_students,
+            "names": [ss.get(key, "") for key in _STUDENT_NAME_KEYS[:num_students]],
+        }
 
     def _restore_student_data(self, num_students):
         """Restore preserved student data to form fields"""
+        ss = st.session_state
+        preserved = ss.preserved_student_data
+
+        # FAST PATH: already restored since the last preserve, or no names
+        # stored -> nothing to copy back on this rerun
+        names = preserved.get("names")
+        if preserved.get("_restored_once") or not names:
+            return
+
         # CRITICAL: Restore the count to show correct number of fields
-        if "_count" in st.session_state.preserved_student_data:
-            restored_count = st.session_state.preserved_student_data["_count"]
-            # Update num_students to match what was preserved
-            if st.session_state.num_students != restored_count:
-                st.session_state.num_students = restored_count
+        count_to_restore = preserved.get("_count", num_students)
+        # Update num_students to match what was preserved
+        if num_students != count_to_restore:
+            ss.num_students = count_to_restore
 
         # Use the restored count for the loop
-        count_to_restore = st.session_state.num_students
-        for i in range(count_to_restore):
-            if f"student_{i}_name" in st.session_state.preserved_student_data:
-                st.session_state[f"student_name_{i}"] = \
-                    st.session_state.preserved_student_data[f"student_{i}_name"]
+        ss.update(zip(_STUDENT_NAME_KEYS[:count_to_restore], names))
+
+        preserved["_restored_once"] = True
 
     def _parse_student_excel_file(self, uploaded_file) -> 'Optional[Dict[str, Any]]':
         """
@@ -4171,6 +4569,7 @@ class CourseView:
         Returns:
             Dictionary with 'editions' list, each containing edition_code and students
         """
+        import pandas as pd
         try:
             # === STEP 1: Try to read the ALLIEVI sheet ===
             # Try multiple possible sheet names (case-insensitive matching)
@@ -4181,7 +4580,7 @@ class CourseView:
 
             # First, check what sheets exist in the file
             try:
-                xls = pd.ExcelFile(uploaded_file, engine='openpyxl')
+                xls = _open_excel_file(uploaded_file)
                 available_sheets = xls.sheet_names
                 st.info(f"📄 Fogli trovati nel file: {', '.join(available_sheets)}")
             except Exception as e:
@@ -4191,7 +4590,7 @@ class CourseView:
             # Try to find the ALLIEVI sheet
             for sheet_name in target_sheets:
                 if sheet_name in available_sheets:
-                    df = pd.read_excel(uploaded_file, sheet_name=sheet_name, header=0, engine='openpyxl')
+                    df = pd.read_excel(xls, sheet_name=sheet_name, header=0)
                     sheet_found = sheet_name
                     break
 
@@ -4199,52 +4598,43 @@ class CourseView:
             if df is None and len(available_sheets) >= 4:
                 last_sheet = available_sheets[-1]
                 st.warning(f"⚠️ Foglio 'ALLIEVI' non trovato, provo ultimo foglio: '{last_sheet}'")
-                df = pd.read_excel(uploaded_file, sheet_name=last_sheet, header=0, engine='openpyxl')
+                df = pd.read_excel(xls, sheet_name=last_sheet, header=0)
                 sheet_found = last_sheet
 
             # Last resort: try first sheet
             if df is None:
                 st.warning("⚠️ Foglio 'ALLIEVI' non trovato, provo il primo foglio...")
-                df = pd.read_excel(uploaded_file, header=0, engine='openpyxl')
+                df = pd.read_excel(xls, header=0)
                 sheet_found = available_sheets[0] if available_sheets else "default"
 
             st.info(f"📊 Lettura foglio: **{sheet_found}** — Colonne: {', '.join(df.columns.astype(str))}")
 
             # === STEP 2: Normalize column names ===
-            df.columns = df.columns.str.strip().str.lower()
+            df.columns = _normalized_columns(df.columns)
+            # Hash-set snapshot of the headers: each alias probe is one set
+            # lookup instead of a pandas Index.__contains__ call
+            col_set = frozenset(df.columns)
 
             # --- Find edition code column ---
             edition_col_names = [
                 'codice edizione', 'codice_edizione', 'edition code',
                 'edizione', 'codice', 'code'
             ]
-            edition_col = None
-            for name in edition_col_names:
-                if name in df.columns:
-                    edition_col = name
-                    break
+            edition_col = next((n for n in edition_col_names if n in col_set), None)
 
             # --- Find person number column ---
             person_col_names = [
                 'person number', 'person_number', 'numero persona',
                 'numero persona', 'numero_persona', 'number', 'id'
             ]
-            person_col = None
-            for name in person_col_names:
-                if name in df.columns:
-                    person_col = name
-                    break
+            person_col = next((n for n in person_col_names if n in col_set), None)
 
             # --- Find OPTIONAL scadenza column ---
             scadenza_col_names = [
                 'data scadenza', 'data_scadenza', 'scadenza',
                 'data di scadenza', 'due date'
             ]
-            scadenza_col = None
-            for name in scadenza_col_names:
-                if name in df.columns:
-                    scadenza_col = name
-                    break
+            scadenza_col = next((n for n in scadenza_col_names if n in col_set), None)
 
             # --- Validate ---
             if not edition_col:
@@ -4264,6 +4654,9 @@ class CourseView:
                 return None
 
             # === STEP 3: Clean and group data ===
+            # Keep only the mapped columns (read_excel's usecols, applied once
+            # the headers are known): dropna and the cleanups copy less
+            df = df[[c for c in (edition_col, person_col, scadenza_col) if c]]
             df = df.dropna(subset=[edition_col, person_col])
 
             if df.empty:
@@ -4290,9 +4683,10 @@ class CourseView:
                 if not edition_code_str or edition_code_str.lower() == 'nan':
                     continue
 
+                # person_col is already cleaned to stripped str above
                 students = [
-                    str(s).strip() for s in group[person_col].tolist()
-                    if str(s).strip() and str(s).strip().lower() != 'nan'
+                    s for s in group[person_col].tolist()
+                    if s and s.lower() != 'nan'
                 ]
 
                 if students:
@@ -4336,7 +4730,6 @@ class CourseView:
 
         except Exception as e:
             st.error(f"❌ Errore lettura Excel: {str(e)}")
-            import traceback
             with st.expander("🔍 Dettagli errore"):
                 st.code(traceback.format_exc())
             return None
@@ -4370,12 +4763,13 @@ class CourseView:
             }
         Each "job" = unique (edition_code, stato) combination.
         """
+        import pandas as pd
         try:
             # === Find ASSEGNA sheet ===
             target_sheets = ['PRESENZA','Presenza', 'presenza', 'ASSEGNA', 'Assegna', 'assegna']
 
             try:
-                xls = pd.ExcelFile(uploaded_file, engine='openpyxl')
+                xls = _open_excel_file(uploaded_file)
                 available_sheets = xls.sheet_names
                 st.info(f"📄 Fogli trovati: {', '.join(available_sheets)}")
             except Exception as e:
@@ -4386,8 +4780,7 @@ class CourseView:
             sheet_found = None
             for sheet_name in target_sheets:
                 if sheet_name in available_sheets:
-                    df = pd.read_excel(uploaded_file, sheet_name=sheet_name,
-                                       header=0, engine='openpyxl')
+                    df = pd.read_excel(xls, sheet_name=sheet_name, header=0)
                     sheet_found = sheet_name
                     break
 
@@ -4405,7 +4798,7 @@ class CourseView:
             st.info(f"📊 Lettura foglio: **{sheet_found}** — {len(df)} righe")
 
             # === Normalize column names ===
-            df.columns = df.columns.str.strip().str.lower()
+            df.columns = _normalized_columns(df.columns)
 
             edition_col_names = ['codice edizione', 'codice_edizione',
                                  'edition code', 'edizione', 'codice', 'code']
@@ -4416,12 +4809,13 @@ class CourseView:
                                'stato_completamento',
                                'completion status', 'status']
 
+            col_set = frozenset(df.columns)
             edition_col = next((n for n in edition_col_names
-                                if n in df.columns), None)
+                                if n in col_set), None)
             person_col = next((n for n in person_col_names
-                               if n in df.columns), None)
+                               if n in col_set), None)
             stato_col = next((n for n in stato_col_names
-                              if n in df.columns), None)
+                              if n in col_set), None)
 
             if not edition_col or not person_col:
                 st.error(
@@ -4484,7 +4878,7 @@ class CourseView:
                 if stato_col:
                     stato_groups = {}
                     for _, row in group.iterrows():
-                        student = str(row[person_col]).strip()
+                        student = row[person_col]  # already a stripped str
                         if not student or student.lower() == 'nan':
                             continue
                         student_stato = normalize_stato(row[stato_col])
@@ -4497,9 +4891,10 @@ class CourseView:
                             'stato': stato_val
                         })
                 else:
+                    # person_col is already cleaned to stripped str above
                     students = [
-                        str(s).strip() for s in group[person_col].tolist()
-                        if str(s).strip() and str(s).strip().lower() != 'nan'
+                        s for s in group[person_col].tolist()
+                        if s and s.lower() != 'nan'
                     ]
                     if students:
                         jobs.append({
@@ -4532,7 +4927,6 @@ class CourseView:
 
         except Exception as e:
             st.error(f"❌ Errore lettura Excel: {str(e)}")
-            import traceback
             with st.expander("🔍 Dettagli errore"):
                 st.code(traceback.format_exc())
             return None
@@ -4544,9 +4938,12 @@ class CourseView:
         B) Excel file upload (multi-edition: CODICE EDIZIONE + PERSON NUMBER from ALLIEVI sheet)
         C) NLP (natural language in Italian)
         """
+        # Read the count once; setdefault covers a session_state cleared mid-session
+        num_students = int(st.session_state.setdefault("num_students", 1))
+
         # Restore preserved data
         if st.session_state.preserved_student_data:
-            self._restore_student_data(st.session_state.num_students)
+            self._restore_student_data(num_students)
 
         # === CHECK FOR SUMMARY/PREVIEW MODE ===
         if st.session_state.get('student_show_summary') and st.session_state.get('student_parsed_data'):
@@ -4556,12 +4953,8 @@ class CourseView:
         # === INPUT METHOD SELECTION ===
         student_method = st.radio(
             "Come vuoi inserire gli allievi?",
-            options=["txt", "excel", "nlp"],
-            format_func=lambda x: {
-                "txt": "📄 Caricamento File TXT",
-                "excel": "📊 Caricamento File Excel",
-                "nlp": "💬 Compilazione con AI"
-            }[x],
+            options=list(_STUDENT_INPUT_LABELS),
+            format_func=_STUDENT_INPUT_LABELS.__getitem__,
             key="student_input_method",
             horizontal=True
         )
@@ -4616,10 +5009,9 @@ class CourseView:
                     )
 
             if submitted:
-                import re
-
-                edition_code = st.session_state.student_edition_code_key.strip()
-                manual_scadenza = st.session_state.get("student_scadenza_key", "").strip()
+                ss = st.session_state.to_dict()
+                edition_code = ss["student_edition_code_key"].strip()
+                manual_scadenza = ss.get("student_scadenza_key", "").strip()
 
                 if not edition_code:
                     st.error("❌ Il campo **Codice Edizione** è obbligatorio.")
@@ -4627,14 +5019,13 @@ class CourseView:
 
                 # Optional: validate the manual date format if provided
                 if manual_scadenza:
-                    import re as _re
                     # accept GG/MM/AAAA, GG.MM.AAAA, GG-MM-AAAA
-                    if not _re.match(r'^\d{2}[/.\-]\d{2}[/.\-]\d{4}$', manual_scadenza):
+                    if not re.match(r'^\d{2}[/.\-]\d{2}[/.\-]\d{4}$', manual_scadenza):
                         st.error("❌ Data scadenza non valida. Usa il formato "
                                  "GG/MM/AAAA (es: 31/12/2026).")
                         st.stop()
 
-                uploaded_txt = st.session_state.get("student_txt_uploader")
+                uploaded_txt = ss.get("student_txt_uploader")
                 if uploaded_txt is None:
                     st.error("❌ Carica un file .txt con numero persona per riga.")
                     st.stop()
@@ -4793,7 +5184,6 @@ class CourseView:
                             )
 
                             if st.form_submit_button("✅ Conferma e Procedi", type="primary"):
-                                import re
                                 if not edition_code.strip():
                                     st.error("❌ Codice Edizione obbligatorio.")
                                     st.stop()
@@ -4861,12 +5251,8 @@ class CourseView:
 
         input_method = st.radio(
             "Come vuoi inserire i dati?",
-            options=["structured", "excel", "nlp"],
-            format_func=lambda x: {
-                "structured": "📝 Input Strutturato (Form)",
-                "excel": "📊 Caricamento File Excel",
-                "nlp": "💬 Compilazione con AI"
-            }[x],
+            options=list(_INPUT_LABELS),
+            format_func=_INPUT_LABELS.__getitem__,
             key="presenza_input_method",
             horizontal=True
         )
@@ -4923,7 +5309,6 @@ class CourseView:
                     on_click=self._clear_presenza_callback)
 
         if submitted:
-            import re
             if not edition_code.strip():
                 st.error("❌ Codice Edizione obbligatorio.")
                 st.stop()
@@ -5000,6 +5385,7 @@ class CourseView:
 
     def _render_presenza_batch_preview(self, batch_data: dict):
         """Preview screen for multi-edition presenza batch."""
+        import pandas as pd
         jobs = batch_data.get('jobs', [])
         total_students = batch_data.get('total_students', 0)
         total_editions = batch_data.get('total_editions', 0)
@@ -5139,8 +5525,6 @@ class CourseView:
         Extracts: edition_code, students list, stato.
         Uses pure regex — no spaCy needed for this simple structure.
         """
-        import re
-
         result = {
             'edition_code': '',
             'students': [],
@@ -5184,6 +5568,7 @@ class CourseView:
 
     def _render_presenza_preview(self, presenza_data: dict):
         """Preview screen before launching presenza automation."""
+        import pandas as pd
 
         edition_code = presenza_data.get('edition_code', '')
         students = presenza_data.get('students', [])
@@ -5237,12 +5622,12 @@ class CourseView:
 
     def _clear_presenza_callback(self):
         """Clear all presenza form state."""
-        st.session_state.presenza_data = None
-        st.session_state.presenza_show_summary = False
-        if "presenza_edition_code" in st.session_state:
-            st.session_state.presenza_edition_code = ""
-        if "presenza_students_text" in st.session_state:
-            st.session_state.presenza_students_text = ""
+        ss = st.session_state
+        reset = {"presenza_data": None, "presenza_show_summary": False}
+        for key in ("presenza_edition_code", "presenza_students_text"):
+            if key in ss:
+                reset[key] = ""
+        ss.update(reset)
 
     def _parse_student_nlp_input(self, text: str) -> 'Optional[Dict[str, Any]]':
         """
@@ -5257,8 +5642,6 @@ class CourseView:
         Returns:
             Dictionary with edition_code and students list, or None if parsing fails
         """
-        import re
-
         text_clean = text.strip()
         text_lower = text_clean.lower()
 
@@ -5317,15 +5700,12 @@ class CourseView:
         if missing_fields:
             st.warning(f"⚠️ Campi mancanti: {', '.join(missing_fields)}")
 
-            if parsed['edition_code']:
-                st.write(f"- ✅ **Codice Edizione:** `{parsed['edition_code']}`")
-            else:
-                st.write("- ❌ **Codice Edizione:** non trovato")
-
-            if parsed['students']:
-                st.write(f"- ✅ **Allievi trovati:** {len(parsed['students'])} numero persona")
-            else:
-                st.write("- ❌ **Allievi:** nessuna numero persona trovata")
+            st.markdown("\n".join((
+                f"- ✅ **Codice Edizione:** `{parsed['edition_code']}`"
+                if parsed['edition_code'] else "- ❌ **Codice Edizione:** non trovato",
+                f"- ✅ **Allievi trovati:** {len(parsed['students'])} numero persona"
+                if parsed['students'] else "- ❌ **Allievi:** nessuna numero persona trovata",
+            )))
 
             # Return partial data if at least something was found
             if parsed['edition_code'] or parsed['students']:
@@ -5339,6 +5719,7 @@ class CourseView:
         Display preview of parsed student data (from Excel) with confirmation buttons.
         Supports multiple editions.
         """
+        import pandas as pd
         editions = batch_data.get('editions', [])
         total_editions = len(editions)
         total_students = batch_data.get('total_students', 0)
@@ -5388,23 +5769,27 @@ class CourseView:
 
             if st.button(btn_text, type="primary", width='stretch', key="batch_student_confirm_btn"):
                 # Store data for automation
+                # All handoff state in ONE session_state write
                 if total_editions == 1:
                     edition = editions[0]
-                    st.session_state.student_details = {
-                        "edition_code": edition['edition_code'],
-                        "students": edition['students'],
-                        "data_scadenza": edition.get('data_scadenza'),
+                    handoff = {
+                        'student_details': StudentDetails(
+                            edition_code=edition['edition_code'],
+                            students=edition['students'],
+                            data_scadenza=edition.get('data_scadenza'),
+                        ),
+                        'app_state': "RUNNING_STUDENTS",
                     }
-                    st.session_state.app_state = "RUNNING_STUDENTS"
                 else:
-                    st.session_state.batch_student_data = {
-                        'editions': editions,
+                    handoff = {
+                        'batch_student_data': {'editions': editions},
+                        'app_state': "RUNNING_BATCH_STUDENTS",
                     }
-                    st.session_state.app_state = "RUNNING_BATCH_STUDENTS"
 
-                st.session_state.student_message = ""
-                st.session_state.student_parsed_data = None
-                st.session_state.student_show_summary = False
+                handoff.update(student_message="",
+                               student_parsed_data=None,
+                               student_show_summary=False)
+                st.session_state.update(handoff)
                 st.rerun()
 
         # --- Verifica Allievi button removed from UI (kept in code, not shown) ---
@@ -5434,19 +5819,17 @@ class CourseView:
         except Exception:
             pass
 
-        placeholder = None
-        if form_type == "course":
-            placeholder = getattr(self, 'course_output_placeholder', None)
-        elif form_type == "edition":
-            placeholder = getattr(self, 'edition_output_placeholder', None)
-        elif form_type == "student":
-            placeholder = getattr(self, 'student_output_placeholder', None)
+        slot = _OUTPUT_SLOTS.get(form_type)
+        # The three attributes always exist (__init__ sets them to None)
+        placeholder = getattr(self, slot[0]) if slot else None
 
         stamp = datetime.now().strftime("%H:%M:%S")
 
         if placeholder is not None:
-            # placeholder.container() REPLACES content every call
-            placeholder.empty()  # clear previous content first
+            # placeholder.container() REPLACES content every call, so each
+            # tick is ONE delta to the browser (no separate empty() first).
+            # NOT an st.fragment: ticks arrive inside the blocking automation
+            # run, and a fragment rerun would abandon it mid-way.
             with placeholder.container():
                 st.progress(percentage / 100)
                 st.info(f"⏳ {message}")
@@ -5527,41 +5910,34 @@ class CourseView:
         if st.button("🔄 Controlla se il server è libero"):
             st.rerun()
 
-    def show_message(self, form_type, message, show_clear_button=False):
-        placeholder = None
-        message_key = ""
-        if form_type == "course":
-            placeholder = getattr(self, 'course_output_placeholder', None)
-            message_key = "course_message"
-        elif form_type == "edition":
-            placeholder = getattr(self, 'edition_output_placeholder', None)
-            message_key = "edition_message"
-        elif form_type == "student":
-            placeholder = getattr(self, 'student_output_placeholder', None)
-            message_key = "student_message"
-
-        if not message_key:
+    def show_message(self, form_type, message, show_clear_button=False, success=None):
+        """
+        success: True/False when the caller already knows the outcome (e.g.
+        an except branch); None falls back to looking for "✅" in the text.
+        """
+        slot = _OUTPUT_SLOTS.get(form_type)
+        if slot is None:
             return
+        placeholder_attr, message_key = slot
+        placeholder = getattr(self, placeholder_attr)  # always set in __init__
 
         st.session_state[message_key] = message
 
+        if success is None:
+            success = "✅" in message
+        render = st.success if success else st.error
+
         # Use placeholder if available, otherwise show directly
         if placeholder is not None:
             with placeholder.container():
-                if "✅" in message:
-                    st.success(message)
-                else:
-                    st.error(message)
+                render(message)
                 if show_clear_button:
                     if st.button(f"🧹 Cancella Messaggio", key=f"clear_{form_type}"):
                         st.session_state[message_key] = ""
                         st.rerun()
         else:
             # Fallback: show directly without placeholder
-            if "✅" in message:
-                st.success(message)
-            else:
-                st.error(message)
+            render(message)
             if show_clear_button:
                 if st.button(f"🧹 Cancella Messaggio", key=f"clear_{form_type}"):
                     st.session_state[message_key] = ""